@@ -1,13 +1,21 @@
-import struct, logging, asyncio
-from threading import Thread
+import struct, logging, asyncio, heapq, itertools
+from threading import Thread, Lock, RLock
+from concurrent.futures import Future
 from functools import partial
 from enum import IntEnum
+from typing import NamedTuple
+from collections import deque
+from queue import Queue, Empty
 import re
-from time import sleep
+from time import sleep, time
 
 import serial
 from serial.tools import list_ports
 
+from ELLRecording import TrafficRecorder
+from ELLPlanner import ELLScanPlan, plan_scan
+from ELLCalibration import ELLCalibration
+
 __version__ = "1.1.0"
 
 class ELLStatus(IntEnum):
@@ -80,6 +88,399 @@ class ELLError(Exception):
         return f"ELLError ({self.status.value}) {self.status.description}"
 
 
+class ELLPriority(IntEnum):
+    """
+    Priority classes of commands sent to the device. Commands of a lower value are sent first.
+    """
+    #: Moves and stop requests.
+    MOTION = 0
+    #: User queries, such as raw commands sent with :meth:`ELL14.query`.
+    USER = 1
+    #: Parameter writes, such as velocity or home offset changes.
+    WRITE = 2
+    #: Background status polling.
+    POLL = 3
+
+
+class ELLMove(NamedTuple):
+    """
+    Record of a completed move, used to model move durations.
+    """
+    #: Position at the start of the move, in raw encoder counts.
+    start: int
+    #: Target position of the move, in raw encoder counts.
+    target: int
+    #: Velocity setting during the move, between 0 and 64.
+    velocity: int
+    #: Time from sending the command to receiving the position reply, in seconds.
+    duration: float
+
+
+class ELLSnapshot(NamedTuple):
+    """
+    Consistent record of the device state, taken at the end of a status poll cycle, and when a
+    move starts or finishes or a parameter is changed.
+    """
+    #: Position, in raw encoder counts.
+    counts: int
+    #: Position, in real device units.
+    position: float
+    #: Velocity setting, between 0 and 64.
+    velocity: int
+    #: Home offset, in real device units.
+    home: float
+    #: Status reported by the device.
+    status: ELLStatus
+    #: True if a move was in progress.
+    moving: bool
+    #: Time the snapshot was taken, in seconds since the epoch.
+    timestamp: float
+
+
+class ELLBus():
+    """
+    Serial port shared by the Elliptec devices connected to it in a "multi drop" arrangement.
+
+    The bus owns the serial port and a single background thread, which sends the commands of all
+    devices on the port in order of their :class:`ELLPriority`. Devices are added with
+    :meth:`connect`, or found and added with :meth:`discover`.
+
+    The ``serial_port`` parameter and keyword arguments are as for :class:`ELL14`.
+
+    :param serial_port: Serial port device the devices are connected to.
+    """
+    def __init__(self, serial_port=None, **kwargs):
+
+        # If serial_port not specified, search for a device
+        if serial_port is None:
+            serial_port = find_device(**kwargs)
+        # Accept a serial.tools.list_ports.ListPortInfo object (which we may have just found)
+        if isinstance(serial_port, serial.tools.list_ports_common.ListPortInfo):
+            serial_port = serial_port.device
+        if serial_port is None:
+            raise RuntimeError("No devices detected matching the selected criteria.")
+
+        # Connected devices, keyed by device ID
+        self._devices = {}
+        # Number of users of each device shared with :meth:`acquire`, keyed by device ID
+        self._users = {}
+        self._devices_lock = Lock()
+        # Pending commands, as a heap of (effective priority, sequence number, submit time, callable,
+        # priority class, owning device)
+        self._queue = []
+        self._queue_lock = Lock()
+        self._sequence = itertools.count()
+        # Recorder of serial traffic, if recording is enabled
+        self._recorder = None
+        # Device running a maintenance operation, which locks the whole bus, or None
+        self._maintenance_device = None
+
+        self._log = logging.getLogger(__name__)
+        self._log.debug(f"Initialising serial port ({serial_port}).")
+        
+        if hasattr(serial_port, "read_until"):
+            # Already opened serial port object, such as a ELLRecording.ReplaySerial
+            self._port = serial_port
+        else:
+            # Open and configure serial port settings for Thor Labs ELLx devices
+            self._port = serial.Serial(port=serial_port,
+                                       baudrate=9600,
+                                       parity=serial.PARITY_NONE,
+                                       stopbits=serial.STOPBITS_ONE,
+                                       bytesize=serial.EIGHTBITS,
+                                       timeout=10.0,
+                                       write_timeout=1.0)
+
+        # Create a new event loop for the bus, running in a separate thread
+        self._eventloop = asyncio.new_event_loop()
+        self._thread = Thread(target=self._run_eventloop, daemon=True)
+        self._thread.start()
+
+
+    @property
+    def port_name(self) -> str:
+        """
+        Serial port device name.
+        """
+        return self._port.name
+
+
+    @property
+    def devices(self) -> dict:
+        """
+        Devices connected on this bus, as a dictionary of :class:`ELL14` keyed by device ID.
+        """
+        return dict(self._devices)
+
+
+    @property
+    def maintenance_device(self) -> "ELL14":
+        """
+        Device running a maintenance operation, or ``None`` if there is none.
+
+        Maintenance operations block the whole bus for several minutes, and must not run on more
+        than one device of the same bus and power supply at a time. While one is running, the
+        status polling of the other devices is held, and their moves are refused.
+        """
+        return self._maintenance_device
+
+
+    def _claim_maintenance(self, device) -> bool:
+        """
+        Reserve the bus for a maintenance operation of a device.
+
+        This should only be called from within the event loop thread.
+
+        :returns: False if a maintenance operation of another device is in progress.
+        """
+        if self._maintenance_device not in (None, device):
+            return False
+        self._maintenance_device = device
+        return True
+
+
+    def _release_maintenance(self, device) -> None:
+        """
+        Release the bus reserved with :meth:`_claim_maintenance`.
+        """
+        if self._maintenance_device is device:
+            self._maintenance_device = None
+
+
+    def _run_eventloop(self):
+        """
+        Run the thread for the event loop.
+        """
+        self._log.debug("Starting event loop.")
+        asyncio.set_event_loop(self._eventloop)
+        try:
+            self._eventloop.run_forever()
+        finally:
+            self._eventloop.close()
+        self._log.debug("Event loop stopped.")
+        if self._port and self._port.is_open:
+            self._log.debug("Closing serial connection.")
+            try:
+                self._port.close()
+            except:
+                self._log.debug("Error closing serial port.")
+
+
+    def _submit(self, priority:ELLPriority, callback, owner=None):
+        """
+        Queue a command to be run in the event loop thread, ahead of any of lower priority.
+
+        Commands of the same priority are run in the order they were submitted. Pending user
+        commands and parameter writes of the same device submitted earlier are promoted to the new
+        command's priority, so that for example a velocity change still takes effect before a
+        subsequent move.
+        """
+        with self._queue_lock:
+            if priority < ELLPriority.POLL and any(item[0] > priority and item[4] < ELLPriority.POLL and item[5] is owner for item in self._queue):
+                self._queue[:] = [(min(item[0], priority) if item[4] < ELLPriority.POLL and item[5] is owner else item[0],) + item[1:] for item in self._queue]
+                heapq.heapify(self._queue)
+            heapq.heappush(self._queue, (priority, next(self._sequence), time(), callback, priority, owner))
+        self._eventloop.call_soon_threadsafe(self._dispatch)
+
+
+    def _dispatch(self):
+        """
+        Run the highest priority pending command, and record how long it waited.
+
+        This should only be called from within the event loop thread.
+        """
+        with self._queue_lock:
+            if not self._queue:
+                return
+            _, _, submitted, callback, priority, owner = heapq.heappop(self._queue)
+            if owner is not None:
+                stats = owner._queue_stats[priority]
+                wait = time() - submitted
+                stats[0] += 1
+                stats[1] += wait
+                stats[2] = max(stats[2], wait)
+        try:
+            callback()
+        except:
+            self._log.exception(f"Exception running {priority.name} priority command!")
+
+
+    def _transfer(self, request_data):
+        """
+        Write a request to the serial port and return the reply read, including the CRLF.
+
+        Both are written to the recording, if one is in progress. Errors writing the request are
+        raised, while an error reading the reply is logged and returns an empty reply.
+
+        This should only be called from within the event loop thread.
+        """
+        recorder = self._recorder
+        if recorder is not None:
+            recorder.request(request_data)
+        self._port.write(bytearray(request_data + "\r\n", "ascii"))
+        self._port.flush()
+        try:
+            indata = self._port.read_until(b"\r\n").decode("ascii")
+        except serial.SerialException:
+            self._log.warning(f"Error reading response string! (requested '{request_data}')")
+            indata = ""
+        if recorder is not None:
+            recorder.reply(indata.rstrip("\r\n"))
+        return indata
+
+
+    def record(self, filename:str) -> None:
+        """
+        Start recording all serial traffic on the port to a file.
+
+        Every request and reply of all devices on the bus, including device scans, is written with
+        a timestamp to a compact binary file, which can be played back using
+        :class:`ELLRecording.ReplaySerial`. Any previous recording is stopped.
+
+        The recording starts with the replies to the ID queries made when the devices currently on
+        the bus were connected, so that the devices can be connected to the replayed port.
+
+        :param filename: File to write the recording to.
+        """
+        self.stop_recording()
+        recorder = TrafficRecorder(filename, port_name=self._port.name)
+        for device_id, device in sorted(self._devices.items()):
+            recorder.request(f"{device_id:01X}in")
+            recorder.reply(device._id_reply)
+        self._recorder = recorder
+
+
+    def stop_recording(self) -> None:
+        """
+        Stop a recording started with :meth:`record`, and close the recording file.
+        """
+        recorder, self._recorder = self._recorder, None
+        if recorder is not None:
+            recorder.close()
+
+
+    def _probe(self, device_id, timeout):
+        """
+        Send an ID query to a device ID, and return the reply if a device answered.
+
+        This should only be called from within the event loop thread.
+        """
+        previous_timeout = self._port.timeout
+        self._port.timeout = timeout
+        try:
+            reply_data = self._transfer(f"{device_id:01X}in").rstrip("\r\n")
+        except serial.SerialException:
+            reply_data = ""
+        finally:
+            self._port.timeout = previous_timeout
+        if len(reply_data) == 33 and reply_data[0:3] == f"{device_id:01X}IN":
+            return reply_data
+        return None
+
+
+    def scan(self, device_ids=range(16), timeout:float=0.2) -> dict:
+        """
+        Probe device IDs on the bus with an ID query, and return those which answered.
+
+        :param device_ids: Device IDs to probe.
+        :param timeout: Time to wait for each device to answer, in seconds.
+        :returns: Dictionary of device serial numbers, keyed by device ID.
+        """
+        found = {}
+        for device_id in device_ids:
+            future = Future()
+            def _run(device_id=device_id):
+                try:
+                    future.set_result(self._probe(device_id, timeout))
+                except Exception as ex:
+                    future.set_exception(ex)
+            self._submit(ELLPriority.USER, _run)
+            reply_data = future.result()
+            if reply_data is not None:
+                found[int(device_id)] = reply_data[5:13]
+        self._log.info(f"Found devices {sorted(found)} on {self.port_name}.")
+        return found
+
+
+    def connect(self, device_id:int=0, **kwargs) -> "ELL14":
+        """
+        Connect to a device on this bus.
+
+        The keyword arguments are passed on to :class:`ELL14`.
+
+        :param device_id: Numeric ID of the device.
+        :returns: The connected device.
+        """
+        return ELL14(device_id=device_id, bus=self, **kwargs)
+
+
+    def acquire(self, device_id:int=0, **kwargs) -> "ELL14":
+        """
+        Get a device on this bus, connecting to it if it is not connected yet.
+
+        All users acquiring the same device ID, such as several Tango devices, share a single
+        :class:`ELL14` instance, and so a single status poll and move state. Each call should be
+        paired with a call to :meth:`release`. The keyword arguments are passed on to
+        :class:`ELL14` if the device is connected, and a ``device_serial`` is also checked against
+        an already connected device.
+
+        :param device_id: Numeric ID of the device.
+        :returns: The shared device.
+        """
+        with self._devices_lock:
+            device = self._devices.get(int(device_id))
+            if device is None:
+                device = self.connect(device_id, **kwargs)
+            elif kwargs.get("device_serial") not in (None, device.serial_number):
+                raise RuntimeError(f"Device does not have expected serial number '{kwargs['device_serial']}'! (device reported '{device.serial_number}')")
+            self._users[device.device_id] = self._users.get(device.device_id, 0) + 1
+            return device
+
+
+    def release(self, device:"ELL14") -> None:
+        """
+        Release a device obtained with :meth:`acquire`, closing it once it has no users left.
+
+        :param device: The device to release.
+        """
+        with self._devices_lock:
+            users = self._users.get(device.device_id, 0) - 1
+            if users > 0:
+                self._users[device.device_id] = users
+                return
+            self._users.pop(device.device_id, None)
+        device.close()
+
+
+    def discover(self, device_ids=range(16), timeout:float=0.2) -> dict:
+        """
+        Find devices on the bus using :meth:`scan`, and acquire each of them.
+
+        Each device found is obtained with :meth:`acquire`, so the caller counts as one of its users
+        and should pass it to :meth:`release` once done with it.
+
+        :param device_ids: Device IDs to probe.
+        :param timeout: Time to wait for each device to answer, in seconds.
+        :returns: Dictionary of the :class:`ELL14` devices found, keyed by device ID.
+        """
+        return {device_id: self.acquire(device_id) for device_id in self.scan(device_ids, timeout)}
+
+
+    def close(self) -> None:
+        """
+        Stop all devices on the bus and close the serial port.
+
+        As for :meth:`ELL14.close`, the serial port is closed in the background thread, and may not
+        actually be closed yet when this method returns.
+        """
+        for device in list(self._devices.values()):
+            if not device._owns_bus:
+                device.close()
+        self.stop_recording()
+        self._log.debug("Stopping event loop.")
+        self._eventloop.call_soon_threadsafe(self._eventloop.stop)
+
+
 class ELL14():
     """
     Generic class to interact with the Thorlabs Elliptec series of devices.
@@ -103,8 +504,8 @@ class ELL14():
     The Elliptec devices support a "multi drop" bus arrangement on the serial port lines, which
     allows control of multiple devices over a single serial link. The ``device_id`` parameter should
     correspond to the device ID number programmed into the device. For single devices on a serial
-    port, the default of ``0`` is probably correct. Support for controlling multiple devices through
-    the same port is not implemented, but may be added in a future update.
+    port, the default of ``0`` is probably correct. To control multiple devices through the same
+    port, pass an :class:`ELLBus` as the ``bus`` parameter, in which case ``serial_port`` is ignored.
 
     The remaining keyword arguments are passed onto :meth:`find_device` for selection of a specific
     serial port device.
@@ -113,6 +514,7 @@ class ELL14():
     :param x: The required "x" in the detected ELLx model number.
     :param device_serial: Serial number required of the detected device.
     :param device_id: Numeric ID to use during serial communications with device.
+    :param bus: :class:`ELLBus` to share with other devices on the same serial port.
     :param vid: Serial port numerical USB vendor ID to match.
     :param pid: Serial port numerical USB product ID to match.
     :param manufacturer: Serial port regular expression to match to a device manufacturer string.
@@ -128,18 +530,12 @@ class ELL14():
     # ELLx device model numbers of multi-position shutters.
     _SHUTTERS = (6, 9)
 
-    _updatequeue = []
+    # Queries made during each status poll cycle, one round-trip each
+    _POLL_STEPS = ("_poll_status", "_poll_position", "_poll_velocity", "_poll_home")
+    # Number of position samples taken during continuous rotation between status queries
+    _STATUS_SAMPLES = 10
 
-    def __init__(self, serial_port=None, x:int=None, device_serial:str=None, device_id:int=0, **kwargs):
-
-        # If serial_port not specified, search for a device
-        if serial_port is None:
-            serial_port = find_device(**kwargs)
-        # Accept a serial.tools.list_ports.ListPortInfo object (which we may have just found)
-        if isinstance(serial_port, serial.tools.list_ports_common.ListPortInfo):
-            serial_port = serial_port.device
-        if serial_port is None:
-            raise RuntimeError("No devices detected matching the selected criteria.")
+    def __init__(self, serial_port=None, x:int=None, device_serial:str=None, device_id:int=0, bus=None, **kwargs):
 
         # Model number of this device. This is the "x" part in ELLx, such as "20" for an ELL20
         if not x is None:
@@ -168,6 +564,20 @@ class ELL14():
         self._status = ELLStatus.UNKNOWN
         # Current position of device, in encoder steps.
         self._position = 0.0
+        # Velocity setting of device, between 0 and 64
+        self._velocity = 0
+        # Home offset of device, in encoder steps. Not named _home, which is the homing method
+        self._home_offset = 0
+
+        # Write-through cache of the velocity and home parameters. Writes update the cached values
+        # above immediately, and are confirmed or rolled back once the device replied.
+        self._param_lock = RLock()
+        # Number of writes made to each parameter, to detect newer writes
+        self._param_versions = {"velocity": 0, "home_offset": 0}
+        # Number of writes not yet answered by the device
+        self._param_pending = {"velocity": 0, "home_offset": 0}
+        # Last values confirmed by the device, to roll back to if a write fails
+        self._param_confirmed = {"velocity": 0, "home_offset": 0}
         # Manufacturing year
         self._year = 0
         # Firmware version
@@ -177,30 +587,114 @@ class ELL14():
 
         # Flag to indicate movement in progress
         self._moving = False
+        # Flag to indicate continuous rotation in progress
+        self._continuous = False
+        # Jog step to restore once continuous rotation is stopped, in encoder steps
+        self._jog_step = None
+        # Recent position samples taken during continuous rotation, as (time, encoder steps)
+        self._samples = deque(maxlen=10000)
+        # Number of position samples taken since the continuous rotation started
+        self._sample_count = 0
+        # Callbacks notified of each new position sample
+        self._subscribers = []
+
+        # Name of the maintenance operation in progress, or None
+        self._maintenance = None
+        # Start time of the maintenance operation in progress
+        self._maintenance_start = 0.0
+        # End time of the last maintenance operation, for the cool-down period
+        self._maintenance_end = 0.0
+        # Number of moves since the last maintenance operation
+        self._move_count = 0
+        # Records of moves since the last maintenance operation, to detect drift
+        self._recent_moves = deque(maxlen=100)
+        # Records of recent moves, as :class:`ELLMove` tuples
+        self._moves = deque(maxlen=1000)
+        # Fitted move duration model coefficients, or None if not fitted yet
+        self._move_model = None
+        # Start time and predicted duration of the move in progress
+        self._move_start = 0.0
+        self._move_prediction = 0.0
+        # Jog step size programmed into the device, in encoder steps
+        self._jog_counts = 0
+        # Move duration model fitted after the last maintenance, to detect drift against
+        self._baseline_model = None
+        # Time of the last move or maintenance operation, to detect idle windows
+        self._last_activity = time()
+        # Automatic maintenance scheduling settings
+        self._auto_maintenance = False
+        self._maintenance_interval = 10000
+        self._maintenance_drift = 0.5
+        self._maintenance_idle = 60.0
+        self._maintenance_cooldown = 1200.0
+
+        # Reply to the ID query, written at the start of recordings so they can be replayed
+        self._id_reply = ""
+        # Latest :class:`ELLSnapshot` of the device state, or None before the first poll cycle
+        self._snapshot = None
+        # Calibration table applied to positions, or None
+        self._calibration = None
+
+        # Statistics per priority class, as [commands sent, total wait time, maximum wait time]
+        self._queue_stats = {priority: [0, 0.0, 0.0] for priority in ELLPriority}
 
-        self._log = logging.getLogger(__name__)
-        self._log.debug(f"Initialising serial port ({serial_port}).")
-        
-        # Open and configure serial port settings for Thor Labs ELLx devices
-        self._port = serial.Serial(port=serial_port,
-                                   baudrate=9600,
-                                   parity=serial.PARITY_NONE,
-                                   stopbits=serial.STOPBITS_ONE,
-                                   bytesize=serial.EIGHTBITS,
-                                   timeout=10.0,
-                                   write_timeout=1.0)
-        
-        # Query device information, check if actually a ELLx device
-        self._query()
-        
-        # Create a new event loop for ourselves, running in a separate thread
-        self._eventloop = asyncio.new_event_loop()
-        self._thread = Thread(target=self._run_eventloop, daemon=True)
-        self._thread.start()
         #: Status polling interval, in seconds.
         self._status_poll_interval = 0.1
-        # Queue first status update, store task handle
-        self._updatehandle = self._eventloop.call_soon_threadsafe(self._update_status)
+        # Handle of the next scheduled status update
+        self._updatehandle = None
+        # Flag to stop polling once closed
+        self._closed = False
+
+        self._log = logging.getLogger(__name__)
+
+        # Share the serial port and event loop of a bus, or create one just for ourselves
+        self._owns_bus = bus is None
+        if self._owns_bus:
+            bus = ELLBus(serial_port, **kwargs)
+        self._bus = bus
+        self._port = bus._port
+        self._eventloop = bus._eventloop
+
+        # Query device information, check if actually a ELLx device
+        try:
+            self._call(ELLPriority.USER, self._query)
+        except:
+            if self._owns_bus:
+                bus.close()
+            raise
+        bus._devices[self._device_id] = self
+
+        # Queue first status update
+        self._eventloop.call_soon_threadsafe(self._update_status)
+
+
+    def _submit(self, priority:ELLPriority, callback, *args, **kwargs):
+        """
+        Queue a command for this device to be run in the event loop thread of the bus.
+        """
+        self._bus._submit(priority, partial(callback, *args, **kwargs), owner=self)
+
+
+    def queue_stats(self) -> dict:
+        """
+        Return statistics on the commands queued for each priority class.
+
+        For each :class:`ELLPriority` name, the number of commands currently pending (``"depth"``),
+        the number of commands sent (``"count"``), and their mean and maximum time spent waiting in
+        the queue in seconds (``"mean_wait"`` and ``"max_wait"``) are given.
+
+        :returns: Dictionary of statistics dictionaries, keyed by priority class name.
+        """
+        with self._bus._queue_lock:
+            depth = {priority: 0 for priority in ELLPriority}
+            for item in self._bus._queue:
+                if item[5] is self:
+                    depth[item[4]] += 1
+            return {priority.name: {"depth": depth[priority],
+                                    "count": count,
+                                    "mean_wait": total/count if count else 0.0,
+                                    "max_wait": longest}
+                    for priority, (count, total, longest) in self._queue_stats.items()}
 
 
     @property
@@ -301,71 +795,204 @@ class ELL14():
 
 
     @property
-    def status(self):
+    def auto_maintenance(self) -> bool:
         """
-        Current state of the ELLx device. The return type is in instance of the :class:`ELLStatus`
-        enum.
+        Automatically run maintenance operations during idle windows. Default is ``False``.
+
+        When enabled, the mechanics are cleaned once :attr:`maintenance_interval` moves were made,
+        and the motors are optimised once recent moves take more than :attr:`maintenance_drift`
+        longer than predicted by a move duration model fitted after the last maintenance. As the
+        model accounts for the distance and velocity of each move, a change to longer or slower
+        moves is not mistaken for drift. Operations only start once the device has been idle for
+        :attr:`maintenance_idle` seconds, at least :attr:`maintenance_cooldown` seconds after the
+        last operation finished, and while no other device on the bus runs one (see
+        :attr:`ELLBus.maintenance_device`).
         """
-        return self._status
+        return self._auto_maintenance
+
+    @auto_maintenance.setter
+    def auto_maintenance(self, value:bool):
+        self._auto_maintenance = bool(value)
 
 
     @property
-    def _pp_string(self):
+    def maintenance_interval(self) -> int:
         """
-        Helper for string to use in "pulses per ..." reports.
+        Number of moves after which the mechanics are cleaned automatically. Default is 10000.
         """
-        if self._x in ELL14._LINEAR_STAGES:
-            return "mm:         "
-        elif self._x in ELL14._ROTATION_STAGES:
-            return "revolution: "
-        else:
-            return "position:   "
-    
+        return self._maintenance_interval
+
+    @maintenance_interval.setter
+    def maintenance_interval(self, value:int):
+        self._maintenance_interval = int(value)
+
 
     @property
-    def _revolution(self):
+    def maintenance_drift(self) -> float:
         """
-        Helper for factor to convert revolution to degrees. Equal to 360.0 for rotation stages, or
-        1.0 for others.
+        Fractional increase in move duration after which the motors are optimised automatically.
+        Default is 0.5, i.e. moves taking 50% longer than predicted from the moves made after the
+        last maintenance.
         """
-        if self._x in ELL14._ROTATION_STAGES:
-            return 360.0
-        else:
-            return 1.0
-    
+        return self._maintenance_drift
 
-    def _query(self):
+    @maintenance_drift.setter
+    def maintenance_drift(self, value:float):
+        self._maintenance_drift = float(value)
+
+
+    @property
+    def maintenance_idle(self) -> float:
         """
-        Query device ID, wait for response.
+        Time without movement required before automatic maintenance starts, in seconds. Default is
+        60 seconds.
         """
-        self._log.debug("Querying ELLx information.")
-        reply_data = self._write_command("in")
-        
-        # 33 byte reply from ELLx should start by echoing IN request
-        if len(reply_data) != 33 or reply_data[0:3] != f"{self._device_id:01X}IN":
-            raise Exception(f"Could not query ELLx information! (response was '{reply_data}')")
-        
-        # Get ELLx model reported in reply
-        x = int(reply_data[3:5], 16)
-        if not self._x is None:
-            # If a specific model is given, check this matches up.
-            if x != self._x:
-                raise RuntimeError(f"Device is not an ELL{self._x}! (device reported to be an ELL{x})")
-        else:
-            # Otherwise, set model from reported value
-            self._x = x
+        return self._maintenance_idle
 
-        # Get serial number reported in reply
-        sn = reply_data[5:13]
-        if not self._serial_number is None:
-            # If serial number given, check it matches
-            if sn != self._serial_number:
-                raise RuntimeError(f"Device does not have expected serial number '{self._serial_number}'! (device reported '{sn}')")
-        else:
-            # Otherwise, set serial number from reported value
-            self._serial_number = sn
+    @maintenance_idle.setter
+    def maintenance_idle(self, value:float):
+        self._maintenance_idle = float(value)
 
-        # Manufacturing year
+
+    @property
+    def maintenance_cooldown(self) -> float:
+        """
+        Time to let the device cool down after a maintenance operation before another is started
+        automatically, in seconds. Default is 1200 seconds, as recommended by Thorlabs.
+        """
+        return self._maintenance_cooldown
+
+    @maintenance_cooldown.setter
+    def maintenance_cooldown(self, value:float):
+        self._maintenance_cooldown = float(value)
+
+
+    @property
+    def maintenance(self) -> str:
+        """
+        Name of the maintenance operation currently in progress, or ``None`` if idle.
+        """
+        return self._maintenance
+
+
+    @property
+    def maintenance_elapsed(self) -> float:
+        """
+        Time the current maintenance operation has been running for, in seconds, or 0.0 if idle.
+        """
+        return time() - self._maintenance_start if self._maintenance else 0.0
+
+
+    @property
+    def move_count(self) -> int:
+        """
+        Number of moves performed since the last maintenance operation.
+        """
+        return self._move_count
+
+
+    @property
+    def last_move_duration(self) -> float:
+        """
+        Duration of the last completed move, in seconds, or 0.0 if no move was completed yet.
+        """
+        return self._moves[-1].duration if self._moves else 0.0
+
+
+    @property
+    def move_eta(self) -> float:
+        """
+        Predicted time remaining until the move in progress completes, in seconds.
+
+        The prediction is based on the move duration model (see :meth:`predict_move_duration`).
+        If no move is in progress, or no prediction is available, this is 0.0.
+        """
+        if not self._moving is True:
+            return 0.0
+        return max(0.0, self._move_start + self._move_prediction - time())
+
+
+    @property
+    def calibration(self) -> ELLCalibration:
+        """
+        Calibration table mapping commanded to true positions, or ``None`` if not calibrated.
+
+        When set, all positions given to and returned from the device are true positions, corrected
+        using the table. See :meth:`load_calibration` and :meth:`calibrate`.
+        """
+        return self._calibration
+
+    @calibration.setter
+    def calibration(self, value:ELLCalibration):
+        self._calibration = value
+
+
+    @property
+    def status(self):
+        """
+        Current state of the ELLx device. The return type is in instance of the :class:`ELLStatus`
+        enum.
+        """
+        return self._status
+
+
+    @property
+    def _pp_string(self):
+        """
+        Helper for string to use in "pulses per ..." reports.
+        """
+        if self._x in ELL14._LINEAR_STAGES:
+            return "mm:         "
+        elif self._x in ELL14._ROTATION_STAGES:
+            return "revolution: "
+        else:
+            return "position:   "
+    
+
+    @property
+    def _revolution(self):
+        """
+        Helper for factor to convert revolution to degrees. Equal to 360.0 for rotation stages, or
+        1.0 for others.
+        """
+        if self._x in ELL14._ROTATION_STAGES:
+            return 360.0
+        else:
+            return 1.0
+    
+
+    def _query(self):
+        """
+        Query device ID, wait for response.
+        """
+        self._log.debug("Querying ELLx information.")
+        reply_data = self._write_command("in")
+        
+        # 33 byte reply from ELLx should start by echoing IN request
+        if len(reply_data) != 33 or reply_data[0:3] != f"{self._device_id:01X}IN":
+            raise Exception(f"Could not query ELLx information! (response was '{reply_data}')")
+        
+        # Get ELLx model reported in reply
+        x = int(reply_data[3:5], 16)
+        if not self._x is None:
+            # If a specific model is given, check this matches up.
+            if x != self._x:
+                raise RuntimeError(f"Device is not an ELL{self._x}! (device reported to be an ELL{x})")
+        else:
+            # Otherwise, set model from reported value
+            self._x = x
+
+        # Get serial number reported in reply
+        sn = reply_data[5:13]
+        if not self._serial_number is None:
+            # If serial number given, check it matches
+            if sn != self._serial_number:
+                raise RuntimeError(f"Device does not have expected serial number '{self._serial_number}'! (device reported '{sn}')")
+        else:
+            # Otherwise, set serial number from reported value
+            self._serial_number = sn
+
+        # Manufacturing year
         self._year = int(reply_data[13:17])
         # Firmware version
         self._firmware_version = reply_data[17:19]
@@ -375,6 +1002,7 @@ class ELL14():
         self._thread_type = "imperial" if int(reply_data[19:21], 16) & 0x80 else "metric"
         # Pulses per mm/revolution
         self._pp = int(reply_data[25:33], 16)
+        self._id_reply = reply_data
         
         self._log.info(f"ELLx serial port:       {self._port.name}")
         self._log.info(f"ELLx type:              {self._x}")
@@ -388,28 +1016,86 @@ class ELL14():
         return reply_data
 
 
-    def _run_eventloop(self):
+    def _update_status(self):
         """
-        Run the thread for the event loop.
+        Start a poll cycle, querying the current state of the ELLx device and updating the cached
+        status, position, velocity and home values.
+
+        Each query of the cycle is submitted separately with :data:`ELLPriority.POLL` priority, so
+        moves, user commands and parameter writes submitted meanwhile are sent in between them.
         """
-        self._log.debug("Starting event loop.")
-        asyncio.set_event_loop(self._eventloop)
+        self._updatehandle = None
+        if not self._closed:
+            self._submit(ELLPriority.POLL, self._poll_step, 0)
+
+
+    def _poll_step(self, index):
+        """
+        Perform one query of a poll cycle, then submit the next one or schedule the next cycle.
+
+        During continuous rotation the position is sampled, and the next sample is requested
+        immediately so the bus is kept as busy as it allows. The status is also queried every few
+        samples, to detect errors such as a motor or thermal error.
+
+        The next query is submitted even if this one raised an exception, such as a
+        :class:`serial.SerialException` from the serial port, so that polling carries on.
+
+        This should only be called from within the event loop thread.
+        """
+        if self._closed:
+            return
+        if self._bus._maintenance_device not in (None, self):
+            # The bus is locked by another device's maintenance operation, which only answers
+            # busy, so hold polling until it has finished
+            self._updatehandle = self._eventloop.call_later(self._status_poll_interval, self._update_status)
+            return
+        if self._continuous:
+            try:
+                self._sample_position()
+                self._sample_count += 1
+                if self._sample_count % ELL14._STATUS_SAMPLES == 0:
+                    self._check_rotation()
+            finally:
+                self._updatehandle = self._eventloop.call_soon(self._update_status)
+            return
+        if self._maintenance:
+            try:
+                self._update_maintenance()
+                self._snapshot = self._take_snapshot()
+            finally:
+                self._updatehandle = self._eventloop.call_later(self._status_poll_interval, self._update_status)
+            return
+
+        last = index + 1 == len(ELL14._POLL_STEPS)
         try:
-            self._eventloop.run_forever()
+            getattr(self, ELL14._POLL_STEPS[index])()
+            if last:
+                self._snapshot = self._take_snapshot()
+                if self._auto_maintenance:
+                    self._schedule_maintenance()
         finally:
-            self._eventloop.close()
-        self._log.debug("Event loop stopped.")
-        if self._port and self._port.is_open:
-            self._log.debug("Closing serial connection.")
-            try:
-                self._port.close()
-            except:
-                self._log.debug("Error closing serial port.")
+            if last:
+                self._updatehandle = self._eventloop.call_later(self._status_poll_interval, self._update_status)
+            else:
+                self._submit(ELLPriority.POLL, self._poll_step, index + 1)
 
 
-    def _update_status(self):
+    def _take_snapshot(self):
+        """
+        Create an :class:`ELLSnapshot` from the currently cached device state.
+        """
+        return ELLSnapshot(counts=int(self._position),
+                           position=self._to_position(self._position),
+                           velocity=int(self._velocity),
+                           home=self._revolution*self._home_offset/self._pp,
+                           status=self._status,
+                           moving=self.is_moving(),
+                           timestamp=time())
+
+
+    def _poll_status(self):
         """
-        Query the current state of the ELLx device, and update the cached status code.
+        Query the device status code.
         """
         self._log.debug("Querying device status.")
         reply_data = self._write_command("gs")
@@ -423,7 +1109,12 @@ class ELL14():
         else:
             self._status = ELLStatus.UNKNOWN
             self._log.warning(f"Could not query device status! (response was '{reply_data}')")
-        
+
+
+    def _poll_position(self):
+        """
+        Query the device position.
+        """
         self._log.debug("Querying device position.")
         reply_data = self._write_command("gp")
         # Should return position data
@@ -432,25 +1123,234 @@ class ELL14():
         else:
             self._log.warning(f"Could not query device position! (response was '{reply_data}')")
 
+
+    def _poll_velocity(self):
+        """
+        Query the device velocity setting.
+        """
         reply_data = self._write_command("gv")
         # Should return velocity data
         if len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GV":
-            self._velocity = int(reply_data[3:])
-        else:
-            self._log.warning(f"Could not query device velocity! (response was '{reply_data}')")
+            velocity = int(reply_data[3:])
+            self._update_parameter("velocity", velocity)
+            return velocity
+        self._log.warning(f"Could not query device velocity! (response was '{reply_data}')")
+        return None
+
 
+    def _poll_home(self):
+        """
+        Query the device home offset.
+        """
         reply_data = self._write_command("go")
         # Should return home data
         if len(reply_data) == 11 and reply_data[0:3] == f"{self._device_id:01X}HO":
-            self._home = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
+            home = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
+            self._update_parameter("home_offset", home)
+            return home
+        self._log.warning(f"Could not query device home! (response was '{reply_data}')")
+        return None
+
+
+    def _stage_parameter(self, name, value):
+        """
+        Update a cached parameter ahead of writing it to the device.
+
+        :returns: Version number of the write, to pass to :meth:`_confirm_parameter`.
+        """
+        with self._param_lock:
+            setattr(self, f"_{name}", value)
+            self._param_versions[name] += 1
+            self._param_pending[name] += 1
+            self._snapshot = self._take_snapshot()
+            return self._param_versions[name]
+
+
+    def _confirm_parameter(self, name, value, version, ok):
+        """
+        Confirm a parameter write once the device replied, or roll it back if it failed.
+
+        A failed write is only rolled back if no newer write was made since.
+        """
+        with self._param_lock:
+            self._param_pending[name] -= 1
+            if ok:
+                self._param_confirmed[name] = value
+            elif self._param_versions[name] == version:
+                self._log.warning(f"Rolling back {name} to {self._param_confirmed[name]}.")
+                setattr(self, f"_{name}", self._param_confirmed[name])
+            self._snapshot = self._take_snapshot()
+
+
+    def _update_parameter(self, name, value):
+        """
+        Update a cached parameter with a value read from the device.
+
+        While writes are pending, the read value may predate them and is ignored.
+        """
+        with self._param_lock:
+            if self._param_pending[name] == 0:
+                setattr(self, f"_{name}", value)
+                self._param_confirmed[name] = value
+
+
+    def _write_parameter(self, name, command_string, value, version):
+        """
+        Write a parameter staged with :meth:`_stage_parameter` and confirm or roll back the write.
+
+        This should only be called from within the event loop thread.
+        """
+        status = self._set_parameter(command_string, name)
+        self._confirm_parameter(name, value, version, status == ELLStatus.OK)
+
+
+    def _read_jog_step(self):
+        """
+        Query the device jog step size.
+        """
+        reply_data = self._write_command("gj")
+        # Should return jog step data
+        if len(reply_data) == 11 and reply_data[0:3] == f"{self._device_id:01X}GJ":
+            self._jog_counts = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
         else:
-            self._log.warning(f"Could not query device home! (response was '{reply_data}')")
-        
-        if len(self._updatequeue)>0:
-            for command in self._updatequeue:
-                reply_data = self._write_command(command)
+            self._log.warning(f"Could not query device jog step! (response was '{reply_data}')")
+        return self._jog_counts
 
-        self._updatehandle = self._eventloop.call_later(self._status_poll_interval, self._update_status)
+
+    def _start_maintenance(self, command_string, name):
+        """
+        Start a long-running maintenance operation, which is then tracked by the status poll.
+
+        Only one maintenance operation may run on a bus at a time. If another device's is in
+        progress, the operation is refused with an :data:`ELLStatus.BUSY` error.
+
+        This should only be called from within the event loop thread.
+        """
+        if not self._bus._claim_maintenance(self):
+            self._log.warning(f"Could not start {name}! (bus locked by maintenance of device #{self._bus._maintenance_device.device_id})")
+            self._moving = ELLError(ELLStatus.BUSY)
+            return
+        self._log.info(f"Starting {name}.")
+        self._moving = True
+        self._maintenance = name
+        self._maintenance_start = time()
+        reply_data = self._write_command(command_string)
+        if len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS":
+            status = ELLStatus(int(reply_data[3:5], 16))
+            if status not in (ELLStatus.OK, ELLStatus.BUSY):
+                self._log.warning(f"Could not start {name}! (device reported status {status})")
+                self._status = status
+                self._maintenance = None
+                self._bus._release_maintenance(self)
+                self._moving = ELLError(status)
+
+
+    def _update_maintenance(self):
+        """
+        Query the device status during a maintenance operation and detect its completion.
+
+        This should only be called from within the event loop thread.
+        """
+        reply_data = self._write_command("gs")
+        if not (len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS"):
+            # Device may not answer while busy, try again on next poll
+            return
+        self._status = ELLStatus(int(reply_data[3:5], 16))
+        if self._status == ELLStatus.BUSY:
+            return
+        self._log.info(f"Finished {self._maintenance} after {self.maintenance_elapsed:.1f} s (status {self._status}).")
+        self._maintenance = None
+        self._maintenance_end = time()
+        self._bus._release_maintenance(self)
+        self._move_count = 0
+        self._recent_moves.clear()
+        self._baseline_model = None
+        self._last_activity = time()
+        self._moving = False if self._status == ELLStatus.OK else ELLError(self._status)
+
+
+    def _schedule_maintenance(self):
+        """
+        Start a maintenance operation if one is due and the device has been idle long enough.
+
+        This should only be called from within the event loop thread.
+        """
+        # A failed move leaves an error in the moving flag, which does not mean the device is busy
+        if self._moving is True or time() - self._last_activity < self._maintenance_idle:
+            return
+        # Let the device cool down, and don't queue up behind another device's operation
+        if time() - self._maintenance_end < self._maintenance_cooldown or self._bus._maintenance_device is not None:
+            return
+        if self._move_count >= self._maintenance_interval:
+            self._start_maintenance("cm", "mechanics cleaning")
+        elif self._baseline_model is not None and len(self._recent_moves) >= 20:
+            # Compare recent durations to those predicted for the same distances and velocities
+            recent = list(self._recent_moves)[-20:]
+            t0, k = self._baseline_model
+            predicted = sum(t0 + k*abs(m.target - m.start)/max(m.velocity, 1) for m in recent)
+            drift = sum(m.duration for m in recent)/predicted - 1.0 if predicted > 0 else 0.0
+            if drift > self._maintenance_drift:
+                self._log.info(f"Moves take {100*drift:.0f}% longer than after last maintenance.")
+                self._start_maintenance("om", "motor optimisation")
+
+
+    def _record_move(self, start, target, duration):
+        """
+        Count a completed move, and record it for drift detection and the move duration model.
+        """
+        move = ELLMove(int(start), int(target), int(self._velocity), duration)
+        self._move_count += 1
+        self._last_activity = time()
+        self._recent_moves.append(move)
+        self._moves.append(move)
+        # Refit the model on next prediction
+        self._move_model = None
+        if self._baseline_model is None and len(self._recent_moves) >= 20:
+            # Stays unset until the moves span a range of distances to fit against
+            self._baseline_model = self._fit_durations(self._recent_moves)
+
+
+    def _sample_position(self):
+        """
+        Query the device position, timestamp it and pass the sample on to any subscribers.
+
+        This should only be called from within the event loop thread.
+        """
+        reply_data = self._write_command("gp")
+        if not (len(reply_data) == 11 and reply_data[0:3] == f"{self._device_id:01X}PO"):
+            self._log.warning(f"Could not sample device position! (response was '{reply_data}')")
+            return
+        self._position = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
+        self._snapshot = self._take_snapshot()
+        timestamp = self._snapshot.timestamp
+        self._samples.append((timestamp, self._position))
+        position = self._snapshot.position
+        for callback in list(self._subscribers):
+            try:
+                callback(timestamp, position)
+            except:
+                self._log.exception("Exception in position sample callback!")
+
+
+    def _check_rotation(self):
+        """
+        Query the device status during continuous rotation, and stop the rotation on an error.
+
+        This should only be called from within the event loop thread.
+        """
+        reply_data = self._write_command("gs")
+        if not (len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS"):
+            self._log.warning(f"Could not query device status! (response was '{reply_data}')")
+            return
+        status = ELLStatus(int(reply_data[3:5], 16))
+        # Busy is expected while rotating
+        if status in (ELLStatus.OK, ELLStatus.BUSY):
+            self._status = status
+            return
+        self._log.warning(f"Device #{self._device_id} reported status {status} during continuous rotation, stopping.")
+        self._stop()
+        self._status = status
+        self._moving = ELLError(status)
 
 
     def _write_command(self, command_string):
@@ -460,25 +1360,31 @@ class ELL14():
         The device ID will be prepended, and a CRLF appended to the given command_string.
         """
         request_data = f"{self._device_id:01X}{command_string}"
-        self._log.debug(f"Writing command string: {request_data}")
-        self._port.write(bytearray(request_data + "\r\n", "ascii"))    
-        self._port.flush()
-        indata = ""
-        while indata[-2:] != "\r\n":
-            try:
-                inbytes = self._port.read(1)
-            except serial.SerialException as ex:
-                self._log.warning(f"Error reading response string! (requested '{request_data}', received '{indata}')")
-                break
-            if len(inbytes) > 0:
-                indata += inbytes.decode("ascii")
-            else:
-                self._log.warning(f"Timeout reading response string! (requested '{request_data}', received '{indata}')")
-                break
+        # Lazy formatting, this is called for every command even with debug logging disabled
+        self._log.debug("Writing command string: %s", request_data)
+        indata = self._bus._transfer(request_data)
+        if indata[-2:] != "\r\n":
+            self._log.warning(f"Timeout reading response string! (requested '{request_data}', received '{indata}')")
         reply_data = indata.rstrip("\r\n")
-        self._log.debug(f"Read response string: {reply_data}")
+        self._log.debug("Read response string: %s", reply_data)
         return reply_data
 
+    def record(self, filename:str) -> None:
+        """
+        Start recording all serial traffic on the device's serial port to a file.
+
+        The recording covers all devices sharing the port, see :meth:`ELLBus.record`.
+
+        :param filename: File to write the recording to.
+        """
+        self._bus.record(filename)
+
+    def stop_recording(self) -> None:
+        """
+        Stop a recording started with :meth:`record`, and close the recording file.
+        """
+        self._bus.stop_recording()
+
     def close(self) -> None:
         """
         Close the serial connection to the ELLx device.
@@ -486,11 +1392,295 @@ class ELL14():
         Note that this method returns immediately, and the halting of communications and closing of
         the serial port is performed in a background thread. This means the serial port may not
         actually be closed yet when this method returns.
+
+        If the device shares the serial port of an :class:`ELLBus` it was not created by, only the
+        status polling of this device is stopped, and the bus remains open.
         """
         self._log.debug("Cancelling scheduled status update handle.")
-        self._updatehandle.cancel()   
-        self._log.debug("Stopping event loop.")
-        self._eventloop.stop()
+        self._closed = True
+        if self._updatehandle is not None:
+            self._updatehandle.cancel()
+        self._bus._devices.pop(self._device_id, None)
+        self._bus._release_maintenance(self)
+        if self._owns_bus:
+            self._bus.close()
+
+    def query(self, command_string:str, timeout:float=None) -> str:
+        """
+        Send a raw command to the device and return its reply.
+
+        The command is sent with :data:`ELLPriority.USER` priority, so it does not wait for a full
+        status poll cycle. The device ID and CRLF are added, as for all commands.
+
+        This must not be called from within the event loop thread.
+
+        :param command_string: Command to send, such as ``"gs"``.
+        :param timeout: Time to wait for the reply, in seconds. Default is to wait indefinitely.
+        :returns: Reply string received from the device.
+        """
+        return self._call(ELLPriority.USER, self._write_command, command_string, timeout=timeout)
+
+
+    def _call(self, priority:ELLPriority, callback, *args, timeout:float=None, **kwargs):
+        """
+        Run a command in the event loop thread with the given priority, and wait for its result.
+
+        Any exception raised by the command is raised again in the calling thread. This must not be
+        called from within the event loop thread.
+        """
+        future = Future()
+        def _run():
+            try:
+                future.set_result(callback(*args, **kwargs))
+            except Exception as ex:
+                future.set_exception(ex)
+        self._submit(priority, _run)
+        return future.result(timeout)
+
+
+    def _set_parameter(self, command_string, parameter_name):
+        """
+        Write a parameter to the device, and check the returned status.
+
+        This should only be called from within the event loop thread.
+
+        :returns: Status reported by the device.
+        """
+        reply_data = self._write_command(command_string)
+        if len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS":
+            status = ELLStatus(int(reply_data[3:5], 16))
+            if not status == ELLStatus.OK:
+                self._log.warning(f"Could not set {parameter_name}! (device reported status {status})")
+            return status
+        self._log.warning(f"Could not set {parameter_name}! (response was '{reply_data}')")
+        return ELLStatus.UNKNOWN
+
+
+    def _set_parameters(self, commands, save):
+        """
+        Write several parameters in one burst, read them back once, and optionally save them.
+
+        The ``commands`` are ``(name, command string, read-back method, expected value, version)``
+        tuples, where the version is that of a cached parameter staged with
+        :meth:`_stage_parameter`, or ``None`` for parameters which are not cached.
+        This should only be called from within the event loop thread.
+
+        :returns: Dictionary of read-back values, keyed by parameter name.
+        """
+        answered = set()
+        try:
+            for name, command_string, _, expected, version in commands:
+                status = self._set_parameter(command_string, name)
+                if version is not None:
+                    self._confirm_parameter(name, expected, version, status == ELLStatus.OK)
+                answered.add(name)
+                if not status == ELLStatus.OK:
+                    raise ELLError(status)
+        finally:
+            # Roll back cached parameters which were not written due to an earlier error
+            for name, _, _, expected, version in commands:
+                if version is not None and name not in answered:
+                    self._confirm_parameter(name, expected, version, False)
+        readback = {}
+        for name, _, read, expected, _ in commands:
+            readback[name] = read()
+            if readback[name] != expected:
+                raise RuntimeError(f"Device did not accept {name}! (wrote {expected}, read back {readback[name]})")
+        if save:
+            self._log.debug("Saving parameters to device memory.")
+            status = self._set_parameter("us", "user data")
+            if not status == ELLStatus.OK:
+                raise ELLError(status)
+        return readback
+
+
+    def set_parameters(self, velocity:int=None, home:float=None, jog_step:float=None, save:bool=False, timeout:float=None) -> dict:
+        """
+        Change several device parameters in a single transaction.
+
+        All given parameters are written to the device back to back, without status polls in
+        between, then read back once to verify they were accepted. With ``save=True``, the new
+        settings are then stored in the device's non-volatile memory with a single save command,
+        so they persist across power cycles.
+
+        This method blocks until the transaction is complete. An :data:`ELLError` is raised if the
+        device reports an error status, or a :class:`RuntimeError` if a read-back value does not
+        match the value written.
+
+        :param velocity: Velocity between 0 and 64.
+        :param home: Home offset, in real device units.
+        :param jog_step: Jog step size, in real device units.
+        :param save: Save the parameters to the device's non-volatile memory.
+        :param timeout: Time to wait for the transaction, in seconds. Default is to wait indefinitely.
+        :returns: Dictionary of the read-back values, in the units they were given in.
+        """
+        commands = []
+        if velocity is not None:
+            velocity = min(int(velocity), 64)
+            version = self._stage_parameter("velocity", velocity)
+            commands.append(("velocity", f"sv{velocity}", self._poll_velocity, velocity, version))
+        if home is not None:
+            counts = round(self._pp*home/self._revolution)
+            version = self._stage_parameter("home_offset", counts)
+            commands.append(("home_offset", f"so{counts & 0xffffffff:08X}", self._poll_home, counts, version))
+        if jog_step is not None:
+            counts = round(self._pp*jog_step/self._revolution)
+            commands.append(("jog_step", f"sj{counts & 0xffffffff:08X}", self._read_jog_step, counts, None))
+        readback = self._call(ELLPriority.WRITE, self._set_parameters, commands, save, timeout=timeout)
+        if "home_offset" in readback:
+            readback["home"] = self._revolution*readback.pop("home_offset")/self._pp
+        if "jog_step" in readback:
+            readback["jog_step"] = self._revolution*readback["jog_step"]/self._pp
+        return readback
+
+
+    def set_velocity(self, velocity:int) -> None:
+        """
+        Set the velocity of the device.
+
+        The value is written with :data:`ELLPriority.WRITE` priority, ahead of background polling.
+        Values above 64 are limited to 64. The new value is returned by :meth:`get_velocity`
+        immediately, and is rolled back if the device rejects it.
+
+        :param velocity: Velocity between 0 and 64.
+        """
+        velocity = min(int(velocity), 64)
+        version = self._stage_parameter("velocity", velocity)
+        self._submit(ELLPriority.WRITE, self._write_parameter, "velocity", f"sv{velocity}", velocity, version)
+
+
+    def set_home(self, position:float) -> None:
+        """
+        Set the home offset of the device, specified in real device units.
+
+        The value is written with :data:`ELLPriority.WRITE` priority, ahead of background polling.
+        The new value is returned by :meth:`get_home` immediately, and is rolled back if the device
+        rejects it.
+
+        :param position: Home offset, in real device units.
+        """
+        self._set_home_raw(round(self._pp*position/self._revolution))
+
+
+    def _set_home_raw(self, counts):
+        """
+        Stage and queue a write of the home offset, in raw encoder counts.
+        """
+        version = self._stage_parameter("home_offset", counts)
+        self._submit(ELLPriority.WRITE, self._write_parameter, "home_offset", f"so{counts & 0xffffffff:08X}", counts, version)
+
+
+    def shift_home(self, amount:float) -> float:
+        """
+        Shift the home offset of the device by a relative amount, specified in real device units.
+
+        The shift is applied to the cached home offset, including any writes not yet confirmed by
+        the device, so that several quick shifts add up. For rotation stages, the resulting offset
+        wraps around a full revolution.
+
+        :param amount: Amount to shift the home offset by, in real device units.
+        :returns: The new home offset, in real device units.
+        """
+        with self._param_lock:
+            counts = self._home_offset + round(self._pp*amount/self._revolution)
+            if self._x in ELL14._ROTATION_STAGES:
+                counts %= self._pp
+            self._set_home_raw(counts)
+        return self._revolution*counts/self._pp
+
+
+    def snapshot(self) -> ELLSnapshot:
+        """
+        Return the latest consistent record of the device state.
+
+        All fields of the returned :class:`ELLSnapshot` are taken at once, so unlike separate calls
+        to :meth:`get_position`, :meth:`get_velocity` etc. they are consistent with each other. A
+        new snapshot is taken at the end of each status poll cycle, when a move starts and once it
+        finished, and when a parameter is written. During continuous rotation, a new snapshot is
+        taken with each position sample.
+
+        :returns: Snapshot of the device state.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            # No poll cycle completed yet
+            snapshot = self._take_snapshot()
+        return snapshot
+
+
+    def _wrap(self, position):
+        """
+        Wrap a position in real device units into a single revolution, for rotation stages.
+        """
+        if self._x not in ELL14._ROTATION_STAGES:
+            return position
+        position = position % self._revolution
+        # Tiny negative values round up to a full revolution
+        return 0.0 if position >= self._revolution else position
+
+
+    def _to_position(self, counts):
+        """
+        Convert encoder counts to real device units, correcting with the calibration table if set.
+
+        The calibration table covers a single revolution, so calibrated positions of rotation
+        stages are wrapped into it. Without a calibration table, positions are not wrapped.
+        """
+        position = self._revolution*counts/self._pp
+        if self._calibration is not None:
+            position = self._wrap(self._calibration.to_true(position))
+        return position
+
+
+    def _to_counts(self, position):
+        """
+        Convert real device units to encoder counts, correcting with the calibration table if set.
+
+        The calibration table covers a single revolution, so calibrated positions of rotation
+        stages are wrapped into it. Without a calibration table, positions are not wrapped.
+        """
+        if self._calibration is not None:
+            position = self._wrap(self._calibration.to_commanded(position))
+        return self._pp*position/self._revolution
+
+
+    def load_calibration(self, filename:str) -> ELLCalibration:
+        """
+        Load a calibration table from a file and apply it to all positions.
+
+        See :meth:`ELLCalibration.ELLCalibration.load` for the file format.
+
+        :param filename: File to load.
+        :returns: The loaded calibration table.
+        """
+        period = self._revolution if self._x in ELL14._ROTATION_STAGES else None
+        self._calibration = ELLCalibration.load(filename, period=period)
+        return self._calibration
+
+
+    def calibrate(self, reference, points:int=36) -> ELLCalibration:
+        """
+        Measure a calibration table against an external reference, and apply it to all positions.
+
+        The device is moved to ``points`` equally spaced positions over one revolution (or its
+        travel, for linear stages), ignoring any calibration currently applied. At each position,
+        ``reference()`` is called, and should return the true position in real device units, for
+        example as read from an external encoder or polarimeter.
+
+        :param reference: Function returning the true position of the device.
+        :param points: Number of positions to measure.
+        :returns: The measured calibration table.
+        """
+        rotation = self._x in ELL14._ROTATION_STAGES
+        span = self._revolution if rotation else self._travel
+        commanded = [span*i/int(points) for i in range(int(points))]
+        true = []
+        for position in commanded:
+            self.move_absolute_raw(round(self._pp*position/self._revolution), blocking=True)
+            true.append(reference())
+        self._calibration = ELLCalibration(commanded, true, period=self._revolution if rotation else None)
+        return self._calibration
+
 
     def get_position_raw(self) -> int:
         """
@@ -507,7 +1697,7 @@ class ELL14():
 
         :returns: Position in real device units.
         """
-        return round(self._revolution*self._position/self._pp, 3)
+        return round(self._to_position(self._position), 3)
 
     def get_velocity(self) -> float:
         """
@@ -523,18 +1713,46 @@ class ELL14():
 
         :returns: home in real device units.
         """
-        return round(self._revolution*self._home/self._pp, 3)
+        return round(self._revolution*self._home_offset/self._pp, 3)
+
+    def _bus_locked(self, command_name:str) -> bool:
+        """
+        Refuse a movement while another device's maintenance operation locks the bus.
+
+        This should only be called from within the event loop thread.
 
-    def _move(self, command_string, command_name="move"):
+        :returns: True if the movement was refused, and the move flag set to a busy error.
+        """
+        if self._bus._maintenance_device in (None, self):
+            return False
+        self._log.warning(f"Could not perform {command_name}! (bus locked by maintenance of device #{self._bus._maintenance_device.device_id})")
+        self._moving = ELLError(ELLStatus.BUSY)
+        return True
+
+
+    def _move(self, command_string, command_name="move", target=None, timed:bool=True):
         """
         Perform a generic movement (home, relative, absolute) and handle the response.
+
+        The ``target`` position in raw encoder counts is used to predict the move duration. Unless
+        ``timed=False``, the move is counted and recorded for maintenance scheduling and the move
+        duration model.
         
         This should only be called from within the event loop thread.
         """
-        self._log.debug(f"Requesting a {command_name}.")
+        # Only stop commands get through while another device's maintenance locks the bus
+        if command_string != "st" and self._bus_locked(command_name):
+            return
+        self._log.debug("Requesting a %s.", command_name)
         # Flag that movement should (soon) be in progress
         self._moving = True
+        self._snapshot = self._take_snapshot()
         try:
+            origin = self._position
+            if target is None:
+                target = origin
+            self._move_prediction = self.predict_move_duration(target - origin)
+            start = self._move_start = time()
             reply_data = self._write_command(command_string)
             # Will reply with status message if something went wrong, else will return position
             if len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS":
@@ -546,9 +1764,11 @@ class ELL14():
                     # Something went wrong, set move flag to error state
                     self._moving = ELLError(self._status)
             elif len(reply_data) == 11 and reply_data[0:3] == f"{self._device_id:01X}PO":
-                # Flag movement now complete
-                self._moving = False
+                # Store position before flagging movement complete, so waiting threads see it
                 self._position = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
+                if timed:
+                    self._record_move(origin, target, time() - start)
+                self._moving = False
             else:
                 self._log.warning(f"Could not perform {command_name}! (response was '{reply_data}')")
                 # Something went wrong, set move flag to error state
@@ -559,6 +1779,9 @@ class ELL14():
             self._moving = ELLError(ELLStatus.UNKNOWN)
             # May not want to raise exception up through the background thread?
             #raise
+        finally:
+            # The poll cycle can't complete during the move, so update the snapshot here
+            self._snapshot = self._take_snapshot()
 
 
     def _home(self, direction:int=0):
@@ -567,7 +1790,7 @@ class ELL14():
         
         This should only be called from within the event loop thread.
         """
-        self._move(command_string=f"ho{int(bool(direction))}", command_name="homing operation")
+        self._move(command_string=f"ho{int(bool(direction))}", command_name="homing operation", target=0)
 
 
     def home(self, direction:int=0, blocking:bool=False) -> None:
@@ -587,7 +1810,334 @@ class ELL14():
         """
         # Flag movement should begin soon
         self._moving = True
-        self._eventloop.call_soon_threadsafe(partial(self._home, direction=direction))
+        self._submit(ELLPriority.MOTION, self._home, direction=direction)
+        if blocking:
+            self.wait(raise_errors=True)
+
+
+    def _rotate(self, direction:int=0):
+        """
+        Start a continuous rotation by jogging with a jog step size of zero.
+
+        This should only be called from within the event loop thread.
+        """
+        if self._bus_locked("continuous rotation"):
+            return
+        self._log.debug("Requesting continuous rotation.")
+        try:
+            # Remember the programmed jog step so it can be restored when stopped
+            reply_data = self._write_command("gj")
+            if len(reply_data) == 11 and reply_data[0:3] == f"{self._device_id:01X}GJ":
+                self._jog_step = struct.unpack(">i", bytes.fromhex(reply_data[3:11]))[0]
+            status = self._set_jog_step_raw(0)
+            if not status == ELLStatus.OK:
+                # Jogging would move by the old step size instead of rotating
+                self._status = status
+                self._jog_step = None
+                self._moving = ELLError(status)
+                return
+            self._samples.clear()
+            self._sample_count = 0
+            self._continuous = True
+            reply_data = self._write_command("bw" if direction else "fw")
+            # A status reply other than OK or busy means the rotation did not start
+            if len(reply_data) == 5 and reply_data[0:3] == f"{self._device_id:01X}GS":
+                status = ELLStatus(int(reply_data[3:5], 16))
+                if status not in (ELLStatus.OK, ELLStatus.BUSY):
+                    self._status = status
+                    self._continuous = False
+                    self._moving = ELLError(status)
+        except:
+            self._log.exception("Exception attempting to start continuous rotation!")
+            self._continuous = False
+            self._moving = ELLError(ELLStatus.UNKNOWN)
+
+
+    def _stop(self):
+        """
+        Stop a continuous rotation and restore the previously programmed jog step.
+
+        This should only be called from within the event loop thread.
+        """
+        self._move(command_string="st", command_name="stop", timed=False)
+        self._continuous = False
+        if self._maintenance:
+            self._log.info(f"Aborted {self._maintenance}.")
+            self._maintenance = None
+            self._maintenance_end = time()
+            self._bus._release_maintenance(self)
+        if self._jog_step is not None:
+            self._set_jog_step_raw(self._jog_step)
+            self._jog_step = None
+
+
+    def _set_jog_step_raw(self, counts):
+        """
+        Program the jog step size of the device, in raw encoder counts.
+
+        This should only be called from within the event loop thread.
+
+        :returns: Status reported by the device.
+        """
+        status = self._set_parameter(f"sj{int(counts) & 0xffffffff:08X}", "jog step")
+        if status == ELLStatus.OK:
+            self._jog_counts = int(counts)
+        return status
+
+
+    def _jog(self, direction:int=0):
+        """
+        Jog the device by the programmed jog step.
+
+        This should only be called from within the event loop thread.
+        """
+        step = -self._jog_counts if direction else self._jog_counts
+        self._move(command_string="bw" if direction else "fw", command_name="jog move", target=self._position + step)
+
+
+    def set_jog_step(self, amount:float) -> None:
+        """
+        Program the jog step size of the device, specified in real device units.
+
+        The jog step is stored on the device, so subsequent calls to :meth:`jog` only need to send
+        a short command without a target position.
+
+        :param amount: Jog step size, in real device units.
+        """
+        self._submit(ELLPriority.WRITE, self._set_jog_step_raw, round(self._pp*amount/self._revolution))
+
+
+    def jog(self, direction:int=0, blocking:bool=False) -> None:
+        """
+        Move the device by the jog step size programmed with :meth:`set_jog_step`.
+
+        The direction of movement is forward for ``direction=0`` and backward for ``direction=1``.
+
+        The default behaviour is for this method to return immediately, without waiting for the
+        operation to complete (or to detect any movement errors). To instead wait for the operation
+        to finish, set the parameter ``blocking=True``. If a movement error occurs, an
+        :data:`ELLError` will be raised.
+
+        :param direction: Direction to move.
+        :param blocking: Wait for operation to complete.
+        """
+        # Flag movement should begin soon
+        self._moving = True
+        self._submit(ELLPriority.MOTION, self._jog, direction=direction)
+        if blocking:
+            self.wait(raise_errors=True)
+
+
+    def step_scan(self, step:float, points:int, direction:int=0, callback=None) -> list:
+        """
+        Perform a scan of equally spaced steps using the device's stored jog step size.
+
+        The jog step is programmed once, then ``points`` jog moves are performed. Compared to
+        absolute moves, each step only needs a short ``fw``/``bw`` command on the serial bus. If a
+        ``callback`` is given, it is called as ``callback(index, position)`` after each step has
+        completed, for example to take a measurement.
+
+        The position reported by the device after each step is recorded and returned. An
+        :data:`ELLError` is raised if the device rejects the step size. Once the scan is finished,
+        the previously programmed jog step is restored.
+
+        :param step: Step size, in real device units.
+        :param points: Number of steps to perform.
+        :param direction: Direction to move, forward for ``0`` and backward for ``1``.
+        :param callback: Function to call after each step.
+        :returns: List of positions reached after each step, in real device units.
+        """
+        previous = self._call(ELLPriority.WRITE, self._read_jog_step)
+        status = self._call(ELLPriority.WRITE, self._set_jog_step_raw, round(self._pp*step/self._revolution))
+        if not status == ELLStatus.OK:
+            raise ELLError(status)
+        positions = []
+        try:
+            for i in range(int(points)):
+                self.jog(direction, blocking=True)
+                position = self._to_position(self._position)
+                positions.append(position)
+                if callback is not None:
+                    callback(i, position)
+        finally:
+            self._submit(ELLPriority.WRITE, self._set_jog_step_raw, previous)
+        return positions
+
+
+    def plan_scan(self, targets, direction:int=None, reversal_cost:float=0.0) -> ELLScanPlan:
+        """
+        Plan the order of visiting a set of target positions which minimises the total move time.
+
+        The plan starts from the current position, takes the circular geometry of rotation stages
+        into account, and uses the move duration model (see :meth:`predict_move_duration`) to
+        predict the total time. See :func:`ELLPlanner.plan_scan` for details.
+
+        :param targets: Target positions, in real device units.
+        :param direction: ``0`` to approach all targets moving forward, ``1`` moving backward,
+            ``None`` for either.
+        :param reversal_cost: Additional time taken by changing direction, in seconds.
+        :returns: The planned :class:`ELLPlanner.ELLScanPlan`.
+        """
+        if self._x not in ELL14._ROTATION_STAGES:
+            raise RuntimeError(f"Scan planning requires a rotation stage! (device is an ELL{self._x})")
+        # Convert the model from encoder counts and velocity to device units
+        if self._move_model is None:
+            self._move_model = self._fit_move_model()
+        t0, k = self._move_model if self._move_model is not None else (0.0, 0.0)
+        unit_cost = k*self._pp/self._revolution/max(int(self._velocity), 1)
+        if self._calibration is not None:
+            # Plan in commanded positions, which the moves are made in
+            targets = self._calibration.to_commanded(targets)
+        return plan_scan(targets, start=self._revolution*self._position/self._pp, period=self._revolution,
+                         direction=direction, move_cost=t0, unit_cost=unit_cost if unit_cost > 0 else 1.0,
+                         reversal_cost=reversal_cost)
+
+
+    def execute_scan(self, targets, direction:int=None, reversal_cost:float=0.0, callback=None) -> list:
+        """
+        Visit a set of target positions in the order planned by :meth:`plan_scan`.
+
+        Targets are reached with relative moves, so the planned direction of travel is kept. The
+        moves are computed in encoder counts from the starting position, so rounding errors do not
+        accumulate. If a ``callback`` is given, it is called as ``callback(index, position)`` once
+        each target is reached, with ``index`` into the given ``targets``.
+
+        :param targets: Target positions, in real device units.
+        :param direction: ``0`` to approach all targets moving forward, ``1`` moving backward,
+            ``None`` for either.
+        :param reversal_cost: Additional time taken by changing direction, in seconds.
+        :param callback: Function to call once each target is reached.
+        :returns: List of positions reached, in real device units within one revolution, in the
+            order of ``targets``.
+        """
+        plan = self.plan_scan(targets, direction=direction, reversal_cost=reversal_cost)
+        start = self._position
+        path = [start + round(c) for c in self._pp*plan.moves.cumsum()/self._revolution]
+        positions = [None]*len(plan.order)
+        for index, counts in zip(plan.order, path):
+            self.move_relative_raw(counts - self._position, blocking=True)
+            positions[index] = self._to_position(self._position) % self._revolution
+            if callback is not None:
+                callback(int(index), positions[index])
+        return positions
+
+
+    def rotate(self, direction:int=0, velocity:int=None) -> None:
+        """
+        Start rotating the device continuously until :meth:`stop` is called.
+
+        The direction of rotation is forward for ``direction=0`` and backward for ``direction=1``.
+        If ``velocity`` is given, it is set with :meth:`set_velocity` before the rotation starts,
+        otherwise the currently set velocity is used.
+
+        While rotating, the position is sampled as fast as the serial bus allows. Each sample is
+        timestamped and passed to callbacks registered with :meth:`subscribe`, or may be consumed
+        using :meth:`stream`.
+
+        :param direction: Direction to rotate.
+        :param velocity: Velocity to rotate at, between 0 and 64.
+        """
+        if velocity is not None:
+            # Queued write is promoted ahead of the rotation
+            self.set_velocity(velocity)
+        # Flag movement should begin soon
+        self._moving = True
+        self._submit(ELLPriority.MOTION, self._rotate, direction=direction)
+
+
+    def stop(self, blocking:bool=False) -> None:
+        """
+        Stop a continuous rotation started with :meth:`rotate`, or abort a maintenance operation.
+
+        :param blocking: Wait for the device to come to rest.
+        """
+        self._submit(ELLPriority.MOTION, self._stop)
+        if blocking:
+            self.wait(raise_errors=True)
+
+
+    def is_rotating(self) -> bool:
+        """
+        Test if the device is currently in continuous rotation mode.
+
+        :returns: True if device is rotating continuously.
+        """
+        return self._continuous
+
+
+    def subscribe(self, callback) -> None:
+        """
+        Register a callback to receive position samples taken during continuous rotation.
+
+        The callback is called from the background thread as ``callback(timestamp, position)``,
+        with the timestamp in seconds since the epoch and the position in real device units.
+
+        :param callback: Function to call with each position sample.
+        """
+        self._subscribers.append(callback)
+
+
+    def unsubscribe(self, callback) -> None:
+        """
+        Remove a callback previously registered with :meth:`subscribe`.
+
+        :param callback: Function to remove.
+        """
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+
+    def stream(self):
+        """
+        Generator yielding ``(timestamp, position)`` samples taken during continuous rotation.
+
+        The generator ends once the rotation is stopped and all pending samples were yielded.
+
+        :returns: Iterator over ``(timestamp, position)`` tuples, position in real device units.
+        """
+        samples = Queue()
+        callback = lambda timestamp, position: samples.put((timestamp, position))
+        self.subscribe(callback)
+        try:
+            while self._continuous or self._moving is True or not samples.empty():
+                try:
+                    yield samples.get(timeout=0.1)
+                except Empty:
+                    continue
+        finally:
+            self.unsubscribe(callback)
+
+
+    def optimize_motors(self, blocking:bool=False) -> None:
+        """
+        Search and store the optimal resonant frequencies of both motors.
+
+        This is a long-running operation, which may take several minutes. By default this method
+        returns immediately, and the progress can be followed using :attr:`maintenance` and
+        :attr:`maintenance_elapsed`. The operation can be aborted using :meth:`stop`. It locks the
+        whole bus, and is refused while another device on the bus runs a maintenance operation.
+
+        :param blocking: Wait for operation to complete.
+        """
+        self._moving = True
+        self._submit(ELLPriority.MOTION, self._start_maintenance, "om", "motor optimisation")
+        if blocking:
+            self.wait(raise_errors=True)
+
+
+    def clean_mechanics(self, blocking:bool=False) -> None:
+        """
+        Run the mechanics cleaning cycle, moving over the full range of travel several times.
+
+        This is a long-running operation, which may take several minutes. By default this method
+        returns immediately, and the progress can be followed using :attr:`maintenance` and
+        :attr:`maintenance_elapsed`. The operation can be aborted using :meth:`stop`. It locks the
+        whole bus, and is refused while another device on the bus runs a maintenance operation.
+
+        :param blocking: Wait for operation to complete.
+        """
+        self._moving = True
+        self._submit(ELLPriority.MOTION, self._start_maintenance, "cm", "mechanics cleaning")
         if blocking:
             self.wait(raise_errors=True)
 
@@ -598,7 +2148,7 @@ class ELL14():
 
         This should only be called from within the event loop thread.
         """
-        self._move(command_string=f"ma{int(counts) & 0xffffffff:08X}", command_name="absolute move")
+        self._move(command_string=f"ma{int(counts) & 0xffffffff:08X}", command_name="absolute move", target=int(counts))
 
 
     def _move_relative_raw(self, counts):
@@ -607,7 +2157,7 @@ class ELL14():
 
         This should only be called from within the event loop thread.
         """
-        self._move(command_string=f"mr{int(counts) & 0xffffffff:08X}", command_name="relative move")
+        self._move(command_string=f"mr{int(counts) & 0xffffffff:08X}", command_name="relative move", target=self._position + int(counts))
 
 
     def move_absolute_raw(self, counts:int, blocking:bool=False) -> None:
@@ -624,7 +2174,7 @@ class ELL14():
         """
         # Flag movement should begin soon
         self._moving = True
-        self._eventloop.call_soon_threadsafe(self._move_absolute_raw, counts)
+        self._submit(ELLPriority.MOTION, self._move_absolute_raw, counts)
         if blocking:
             self.wait(raise_errors=True)
 
@@ -641,7 +2191,7 @@ class ELL14():
         :param position: Position to move to, in real device units.
         :param blocking: Wait for operation to complete.
         """
-        self.move_absolute_raw(self._pp*position/self._revolution, blocking=blocking)
+        self.move_absolute_raw(round(self._to_counts(position)), blocking=blocking)
 
 
     def move_relative_raw(self, counts:int, blocking:bool=False) -> None:
@@ -658,7 +2208,7 @@ class ELL14():
         """
         # Flag movement should begin soon
         self._moving = True
-        self._eventloop.call_soon_threadsafe(self._move_relative_raw, counts)
+        self._submit(ELLPriority.MOTION, self._move_relative_raw, counts)
         if blocking:
             self.wait(raise_errors=True)
 
@@ -675,7 +2225,83 @@ class ELL14():
         :param amount: Amount to move by, in real device units.
         :param blocking: Wait for operation to complete.
         """
-        self.move_relative_raw(self._pp*amount/self._revolution, blocking=blocking)
+        counts = self._pp*amount/self._revolution
+        if self._calibration is not None:
+            # Move relative to the true position, so the target is corrected too. The correction
+            # is small, so for rotation stages it is wrapped to within half a revolution.
+            correction = self._to_counts(self._to_position(self._position) + amount) - self._position - counts
+            if self._x in ELL14._ROTATION_STAGES:
+                correction = (correction + self._pp/2) % self._pp - self._pp/2
+            counts += correction
+        self.move_relative_raw(round(counts), blocking=blocking)
+
+
+    def get_moves(self) -> list:
+        """
+        Return the records of recently completed moves.
+
+        :returns: List of :class:`ELLMove` records, oldest first.
+        """
+        return list(self._moves)
+
+
+    @staticmethod
+    def _fit_durations(moves):
+        """
+        Fit the move duration model ``t0 + k*distance/velocity`` to a list of moves.
+
+        The distance is in encoder counts and the velocity setting in percent, fitted by linear
+        least squares. Returns ``(t0, k)``, or ``None`` if there are too few moves, or they do not
+        span a range of distances.
+        """
+        moves = list(moves)
+        n = len(moves)
+        if n < 5:
+            return None
+        x = [abs(m.target - m.start)/max(m.velocity, 1) for m in moves]
+        y = [m.duration for m in moves]
+        x_mean = sum(x)/n
+        y_mean = sum(y)/n
+        sxx = sum((xi - x_mean)**2 for xi in x)
+        if sxx == 0:
+            return None
+        k = sum((xi - x_mean)*(yi - y_mean) for xi, yi in zip(x, y))/sxx
+        k = max(k, 0.0)
+        return (y_mean - k*x_mean, k)
+
+
+    def _fit_move_model(self):
+        """
+        Fit the move duration model to the recorded moves.
+
+        See :meth:`_fit_durations`. If there are too few moves, or they do not span a range of
+        distances, the mean duration is used as ``t0``.
+        """
+        moves = list(self._moves)
+        if not moves:
+            return None
+        model = self._fit_durations(moves)
+        if model is None:
+            return (sum(m.duration for m in moves)/len(moves), 0.0)
+        return model
+
+
+    def predict_move_duration(self, distance:int, velocity:int=None) -> float:
+        """
+        Predict the duration of a move from the recorded durations of previous moves.
+
+        :param distance: Distance to move, in raw encoder counts.
+        :param velocity: Velocity setting, between 0 and 64. Defaults to the current setting.
+        :returns: Predicted move duration in seconds, or 0.0 if no moves were recorded yet.
+        """
+        if self._move_model is None:
+            self._move_model = self._fit_move_model()
+            if self._move_model is None:
+                return 0.0
+        if velocity is None:
+            velocity = self._velocity
+        t0, k = self._move_model
+        return max(0.0, t0 + k*abs(distance)/max(int(velocity), 1))
 
 
     def is_moving(self, raise_errors:bool=False) -> bool:
@@ -711,7 +2337,11 @@ class ELL14():
         while True:
             if not self.is_moving(raise_errors=raise_errors):
                 return
-            sleep(0.01)
+            # Sleep through half the predicted remaining time rather than polling continuously,
+            # but only if the model accounts for the move distance, not just the mean duration
+            model = self._move_model
+            eta = self.move_eta if model is not None and model[1] > 0 else 0.0
+            sleep(min(max(eta/2, 0.01), 0.5))
 
 
 def find_device(vid:int=None, pid:int=None, manufacturer:str=None, product:str=None, serial_number:str=None, location:str=None):
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Discover Thorlabs ELL14 stages on all serial ports, register them as Tango devices, and
+distribute them over several server processes.
+
+Ports are probed in parallel. All stages of one port are assigned to the same server process,
+as they share the serial port, and ports are spread over the processes so that one hung USB hub
+only stalls the stages behind it::
+
+    python ELL14Launcher.py --shards 4 --start
+"""
+
+import argparse, json, logging, os, subprocess, sys
+from threading import Thread
+from time import perf_counter
+
+from serial.tools import list_ports
+
+from ELL14 import ELLBus, find_device
+
+__all__ = ["discover", "shard", "register", "launch", "main"]
+
+# Tango server started for each shard, serving both the bus and per-axis device classes
+SERVER = "ThorlabsELL14Bus"
+
+
+def _scan_port(port, device_ids, timeout, results):
+    """
+    Probe all device IDs on one serial port, storing the devices found or the exception raised.
+    """
+    try:
+        bus = ELLBus(port)
+        try:
+            results[port] = bus.scan(device_ids, timeout)
+        finally:
+            bus.close()
+    except Exception as ex:
+        results[port] = ex
+
+
+def discover(ports=None, device_ids=range(16), timeout:float=0.2, port_timeout:float=30.0, **kwargs) -> list:
+    """
+    Probe serial ports in parallel for Elliptec stages.
+
+    If ``ports`` is not given, all serial ports are probed, or only the first port matching the
+    keyword arguments of :func:`~ELL14.find_device` if any are given. Ports which fail to open, or
+    do not finish probing within ``port_timeout`` seconds, are skipped.
+
+    :param ports: Serial port names to probe.
+    :param device_ids: Device IDs to probe on each port.
+    :param timeout: Time to wait for each device to answer, in seconds.
+    :param port_timeout: Time to wait for all devices of a port, in seconds.
+    :returns: List of ``{"port", "address", "serial_number"}`` dictionaries of discovered stages.
+    """
+    log = logging.getLogger(__name__)
+    if ports is None:
+        if kwargs:
+            port = find_device(**kwargs)
+            ports = [port.device] if port is not None else []
+        else:
+            ports = [p.device for p in list_ports.comports()]
+    # Daemon threads, so that threads stuck on hung ports don't keep the process from exiting
+    results = {}
+    threads = {port: Thread(target=_scan_port, args=(port, device_ids, timeout, results), daemon=True)
+               for port in ports}
+    for thread in threads.values():
+        thread.start()
+    deadline = perf_counter() + port_timeout
+    devices = []
+    for port, thread in threads.items():
+        thread.join(max(deadline - perf_counter(), 0.0))
+        if thread.is_alive():
+            log.warning(f"Timeout probing port {port}, skipping it.")
+            continue
+        found = results[port]
+        if isinstance(found, Exception):
+            log.warning(f"Could not probe port {port}, skipping it. ({found})")
+            continue
+        devices += [{"port": port, "address": address, "serial_number": serial_number}
+                    for address, serial_number in sorted(found.items())]
+    return devices
+
+
+def shard(devices:list, shards:int) -> list:
+    """
+    Distribute discovered stages over a number of server processes.
+
+    All stages of a port are kept together. Ports are assigned, largest first, to the server with
+    the fewest stages so far.
+
+    :param devices: Stages as returned by :func:`discover`.
+    :param shards: Number of server processes.
+    :returns: List of stage lists, one per server process.
+    """
+    ports = {}
+    for device in devices:
+        ports.setdefault(device["port"], []).append(device)
+    layout = [[] for _ in range(max(int(shards), 1))]
+    for port_devices in sorted(ports.values(), key=len, reverse=True):
+        min(layout, key=len).extend(port_devices)
+    return layout
+
+
+def register(layout:list, domain:str="ell14", server:str=SERVER) -> list:
+    """
+    Register or update the Tango devices of a shard layout in the Tango database.
+
+    Each stage becomes a ThorlabsELL14 device named ``<domain>/ell14/<serial number>``, served by
+    the ``<server>/shard<N>`` server instance with its Port, Address and StageSerial properties set.
+    Devices which already exist are moved to their new server instance.
+
+    :param layout: Shard layout as returned by :func:`shard`.
+    :param domain: Domain part of the device names.
+    :param server: Name of the server executable.
+    :returns: List of registered server instance names.
+    """
+    import tango
+    db = tango.Database()
+    instances = []
+    for index, devices in enumerate(layout):
+        instance = f"{server}/shard{index}"
+        instances.append(instance)
+        for device in devices:
+            info = tango.DbDevInfo()
+            info.name = f"{domain}/ell14/{device['serial_number']}"
+            info._class = "ThorlabsELL14"
+            info.server = instance
+            db.add_device(info)
+            db.put_device_property(info.name, {"Port": [device["port"]],
+                                               "Address": [str(device["address"])],
+                                               "StageSerial": [device["serial_number"]]})
+    return instances
+
+
+def launch(layout:list, server:str=SERVER) -> list:
+    """
+    Start one server process per non-empty shard.
+
+    :param layout: Shard layout as returned by :func:`shard`.
+    :param server: Name of the server executable.
+    :returns: List of started processes.
+    """
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), f"{server}.py")
+    return [subprocess.Popen([sys.executable, script, f"shard{index}"])
+            for index, devices in enumerate(layout) if devices]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--shards", type=int, default=1, help="number of server processes")
+    parser.add_argument("--domain", default="ell14", help="domain part of the device names")
+    parser.add_argument("--ports", nargs="*", help="serial ports to probe, default is all")
+    parser.add_argument("--timeout", type=float, default=0.2, help="time to wait for each device ID, in seconds")
+    parser.add_argument("--dry-run", action="store_true", help="only report the layout, don't register devices")
+    parser.add_argument("--start", action="store_true", help="start the server processes")
+    parser.add_argument("--json", action="store_true", help="report the layout as JSON")
+    args = parser.parse_args(args)
+    logging.basicConfig(level=logging.WARNING)
+
+    start = perf_counter()
+    devices = discover(args.ports, timeout=args.timeout)
+    discovery_time = perf_counter() - start
+    layout = shard(devices, args.shards)
+
+    if args.json:
+        print(json.dumps({"discovery_time": discovery_time, "shards": layout}, indent=2))
+    else:
+        print(f"Discovered {len(devices)} stages in {discovery_time:.2f} s")
+        for index, shard_devices in enumerate(layout):
+            print(f"shard{index}: " + ", ".join(f"{d['serial_number']} ({d['port']} #{d['address']})" for d in shard_devices))
+
+    if not args.dry_run:
+        register(layout, domain=args.domain)
+        if args.start:
+            for process in launch(layout):
+                process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+import numpy as np
+
+
+class ELLCalibration():
+    """
+    Calibration table mapping the positions commanded to a stage to the true positions reached.
+
+    The table is stored as the error ``true - commanded`` at each commanded position, and applied
+    by linear interpolation, which works equally on single values and arrays of positions. For
+    rotation stages, the interpolation wraps around the given ``period``, so positions outside
+    of the first revolution are also corrected.
+
+    A table can be created from measured values, loaded from a file with :meth:`load`, or measured
+    against an external reference with :meth:`ELL14.ELL14.calibrate`.
+
+    :param commanded: Commanded positions, in device units.
+    :param true: True positions measured at the commanded positions, in device units.
+    :param period: Period of the positions, such as ``360.0`` degrees, or ``None`` if not periodic.
+    """
+    def __init__(self, commanded, true, period:float=360.0):
+        commanded = np.asarray(commanded, dtype=float).ravel()
+        true = np.asarray(true, dtype=float).ravel()
+        if commanded.shape != true.shape or len(commanded) == 0:
+            raise ValueError("Calibration table needs the same non-zero number of commanded and true positions.")
+        error = true - commanded
+        if period is not None:
+            commanded = np.mod(commanded, period)
+            # Errors are small, so wrap them into half a period either side of zero
+            error = np.mod(error + period/2, period) - period/2
+        sort = np.argsort(commanded)
+        self._commanded = commanded[sort]
+        self._error = error[sort]
+        self._period = period
+
+    @property
+    def commanded(self) -> np.ndarray:
+        """
+        Commanded positions of the table, in device units.
+        """
+        return self._commanded.copy()
+
+    @property
+    def true(self) -> np.ndarray:
+        """
+        True positions of the table, in device units.
+        """
+        return self._commanded + self._error
+
+    def _interpolate(self, position):
+        return np.interp(position, self._commanded, self._error, period=self._period)
+
+    def to_true(self, commanded):
+        """
+        Convert commanded positions to the true positions reached.
+
+        :param commanded: Commanded position or array of positions, in device units.
+        :returns: True position or array of positions, in device units.
+        """
+        result = commanded + self._interpolate(commanded)
+        return float(result) if np.ndim(result) == 0 else result
+
+    def to_commanded(self, true):
+        """
+        Convert true positions to the positions which need to be commanded to reach them.
+
+        The inverse mapping is found by fixed-point iteration, which converges quickly as the
+        errors vary slowly with position.
+
+        :param true: True position or array of positions, in device units.
+        :returns: Commanded position or array of positions, in device units.
+        """
+        true = np.asarray(true, dtype=float)
+        commanded = true - self._interpolate(true)
+        for _ in range(3):
+            commanded = true - self._interpolate(commanded)
+        return float(commanded) if np.ndim(commanded) == 0 else commanded
+
+    @classmethod
+    def load(cls, filename:str, period:float=360.0) -> "ELLCalibration":
+        """
+        Load a calibration table from a text file.
+
+        The file should have two columns of commanded and true positions. Lines starting with
+        ``#`` are ignored.
+
+        :param filename: File to load.
+        :param period: Period of the positions, or ``None`` if not periodic.
+        :returns: The loaded calibration table.
+        """
+        table = np.loadtxt(filename, ndmin=2)
+        return cls(table[:, 0], table[:, 1], period=period)
+
+    def save(self, filename:str) -> None:
+        """
+        Save the calibration table to a text file, in the format read by :meth:`load`.
+
+        :param filename: File to write.
+        """
+        np.savetxt(filename, np.column_stack((self._commanded, self.true)), header="commanded true")
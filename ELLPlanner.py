@@ -0,0 +1,90 @@
+from typing import NamedTuple
+
+import numpy as np
+
+
+class ELLScanPlan(NamedTuple):
+    """
+    Order in which to visit a set of target positions, and the moves which realise it.
+    """
+    #: Indices into the given targets, in the order they are visited.
+    order: np.ndarray
+    #: Signed relative move to reach each target from the previous one, in device units.
+    moves: np.ndarray
+    #: Predicted total time of all moves, in seconds (or distance, if no move model is given).
+    duration: float
+
+
+def plan_scan(targets, start:float=0.0, period:float=360.0, direction:int=None, move_cost:float=0.0, unit_cost:float=1.0, reversal_cost:float=0.0) -> ELLScanPlan:
+    """
+    Find the order of visiting target positions on a circle which minimises the total move time.
+
+    The time of each move is modelled as ``move_cost + unit_cost*distance``, and changing
+    direction costs an additional ``reversal_cost``. As every target takes one move, the
+    ``move_cost`` does not affect the order, but is included in the predicted duration.
+
+    With ``direction=0`` or ``direction=1``, all targets are approached moving forward or backward
+    respectively, which gives repeatable positioning free of backlash. Otherwise, the best path
+    either travels in one direction, or turns around once: it goes one way to some target, then
+    back past the start to cover the rest. Every turning point is evaluated at once using vectorised
+    operations, so planning thousands of targets is fast.
+
+    :param targets: Target positions, in device units.
+    :param start: Current position, in device units.
+    :param period: Period of the circular geometry, such as ``360.0`` degrees.
+    :param direction: ``0`` for forward only, ``1`` for backward only, ``None`` for either.
+    :param move_cost: Time taken by every move, in seconds.
+    :param unit_cost: Time taken per device unit moved, in seconds.
+    :param reversal_cost: Additional time taken by changing direction, in seconds.
+    :returns: The planned :class:`ELLScanPlan`.
+    """
+    targets = np.asarray(targets, dtype=float).ravel()
+
+    # Forward distance from the start to each target, and targets sorted by it. Targets at the
+    # start itself are visited first, without moving.
+    offsets = np.mod(targets - start, period)
+    sort = np.argsort(offsets, kind="stable")
+    at_start = np.count_nonzero(offsets == 0)
+    here, sort = sort[:at_start], sort[at_start:]
+    f = offsets[sort]
+
+    if len(f) == 0:
+        order, coords = sort, f
+    elif direction == 0:
+        order, coords = sort, f
+    elif direction == 1:
+        order, coords = sort[::-1], f[::-1] - period
+    else:
+        # Turning after visiting the first k targets going forward, k = 0 means going backward
+        # only. f_before[k] is the furthest forward target visited, f_after[k] the furthest target
+        # left to visit going backward.
+        n = len(f)
+        f_before = np.concatenate(([0.0], f))
+        f_after = np.concatenate((f, [period]))
+        # Forward first, then back past the start to the remaining targets
+        forward_first = 2*f_before + (period - f_after)
+        # Backward first to the targets after k, then forward past the start to the rest
+        backward_first = 2*(period - f_after) + f_before
+        turns = np.arange(n + 1)
+        reversal = reversal_cost*((turns > 0) & (turns < n))
+        forward_first = unit_cost*forward_first + reversal
+        backward_first = unit_cost*backward_first + reversal
+        # Without targets on the backward side, there is nothing to come back for
+        forward_first[n] = unit_cost*f[-1]
+        backward_first[0] = unit_cost*(period - f[0])
+        k_forward = int(np.argmin(forward_first))
+        k_backward = int(np.argmin(backward_first))
+        if forward_first[k_forward] <= backward_first[k_backward]:
+            k = k_forward
+            order = np.concatenate((sort[:k], sort[k:][::-1]))
+            coords = np.concatenate((f[:k], f[k:][::-1] - period))
+        else:
+            k = k_backward
+            order = np.concatenate((sort[k:][::-1], sort[:k]))
+            coords = np.concatenate((f[k:][::-1] - period, f[:k]))
+
+    order = np.concatenate((here, order))
+    moves = np.diff(np.concatenate(([0.0], np.zeros(at_start), coords)))
+    reversals = np.count_nonzero(np.diff(np.sign(moves[moves != 0])))
+    duration = len(targets)*move_cost + unit_cost*float(np.abs(moves).sum()) + reversal_cost*reversals
+    return ELLScanPlan(np.asarray(order, dtype=int), moves, float(duration))
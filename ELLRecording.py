@@ -0,0 +1,182 @@
+import struct, threading
+from collections import defaultdict, deque
+from time import sleep, time
+
+import serial
+
+# Magic bytes at the start of every recording file
+_MAGIC = b"ELLREC1\n"
+# Record header: timestamp in seconds since the epoch, direction, payload length
+_RECORD = struct.Struct("<dBH")
+# Record directions
+REQUEST = 0
+REPLY = 1
+
+
+class TrafficRecorder():
+    """
+    Record the requests written to and replies read from an Elliptec serial port.
+
+    The recording is a compact binary file. It starts with a magic string and the serial port name,
+    followed by one record per request or reply, each consisting of a timestamp, the direction
+    (:data:`REQUEST` or :data:`REPLY`) and the ASCII payload without the trailing CRLF.
+
+    Recordings can be read back using :func:`read_recording`, or played back as a fake serial port
+    using :class:`ReplaySerial`.
+
+    :param filename: File to write the recording to.
+    :param port_name: Name of the recorded serial port, stored in the file header.
+    """
+    def __init__(self, filename:str, port_name:str=""):
+        self._lock = threading.Lock()
+        self._file = open(filename, "wb")
+        name = port_name.encode("utf-8")
+        self._file.write(_MAGIC + struct.pack("<H", len(name)) + name)
+
+    def _write(self, direction, data):
+        payload = data.encode("ascii")
+        record = _RECORD.pack(time(), direction, len(payload)) + payload
+        with self._lock:
+            if not self._file.closed:
+                self._file.write(record)
+
+    def request(self, data:str) -> None:
+        """
+        Record a request written to the serial port.
+
+        :param data: Request string, without the trailing CRLF.
+        """
+        self._write(REQUEST, data)
+
+    def reply(self, data:str) -> None:
+        """
+        Record a reply read from the serial port.
+
+        :param data: Reply string, without the trailing CRLF.
+        """
+        self._write(REPLY, data)
+
+    def close(self) -> None:
+        """
+        Flush and close the recording file.
+        """
+        with self._lock:
+            self._file.close()
+
+
+def read_recording(filename:str):
+    """
+    Read a recording written by :class:`TrafficRecorder`.
+
+    :param filename: Recording file to read.
+    :returns: Tuple of the recorded serial port name and a list of ``(timestamp, direction, data)``
+        tuples, in recorded order.
+    """
+    with open(filename, "rb") as f:
+        content = f.read()
+    if content[:len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"'{filename}' is not an Elliptec traffic recording.")
+    offset = len(_MAGIC)
+    (name_length,) = struct.unpack_from("<H", content, offset)
+    offset += 2
+    port_name = content[offset:offset + name_length].decode("utf-8")
+    offset += name_length
+    records = []
+    while offset + _RECORD.size <= len(content):
+        timestamp, direction, length = _RECORD.unpack_from(content, offset)
+        offset += _RECORD.size
+        records.append((timestamp, direction, content[offset:offset + length].decode("ascii")))
+        offset += length
+    return port_name, records
+
+
+class ReplaySerial():
+    """
+    Fake serial port which answers requests with the replies from a recording.
+
+    An instance may be passed as the ``serial_port`` parameter of :class:`~ELL14.ELL14` in place
+    of a real serial port, for example to benchmark changes against recorded traffic patterns.
+
+    Each reply is delayed by the time the device took to answer in the recording, divided by
+    ``speed``. A ``speed`` of ``2.0`` replays twice as fast, while a ``speed`` of ``0`` returns
+    replies immediately.
+
+    With ``strict=True``, requests must arrive in exactly the recorded order, otherwise a
+    :class:`serial.SerialException` is raised. By default, each request is answered with the next
+    recorded reply to the same request, so that interleaving of status polls and user commands may
+    differ from the recording. Once all replies to a request were used, the last one is repeated.
+
+    :param filename: Recording file written by :class:`TrafficRecorder`.
+    :param speed: Factor to accelerate the recorded reply timing by.
+    :param strict: Require requests to match the recorded order exactly.
+    :param timeout: Read timeout in seconds, if no reply is pending.
+    """
+    def __init__(self, filename:str, speed:float=1.0, strict:bool=False, timeout:float=1.0):
+        self.name, records = read_recording(filename)
+        self.timeout = timeout
+        self.is_open = True
+        self._speed = float(speed)
+        self._strict = bool(strict)
+        # Pair up requests with their replies and response times
+        self._exchanges = []
+        request = None
+        for timestamp, direction, data in records:
+            if direction == REQUEST:
+                request = (timestamp, data)
+            elif request is not None:
+                self._exchanges.append((request[1], data, timestamp - request[0]))
+                request = None
+        self._cursor = 0
+        self._replies = defaultdict(deque)
+        self._last_reply = {}
+        for request, reply, latency in self._exchanges:
+            self._replies[request].append((reply, latency))
+        # Reply waiting to be read, and the time it becomes available
+        self._pending = None
+        self._pending_time = 0.0
+
+    def _lookup(self, request):
+        if self._strict:
+            if self._cursor >= len(self._exchanges) or self._exchanges[self._cursor][0] != request:
+                raise serial.SerialException(f"Unexpected request '{request}' at position {self._cursor} of recording.")
+            _, reply, latency = self._exchanges[self._cursor]
+            self._cursor += 1
+            return reply, latency
+        if self._replies[request]:
+            self._last_reply[request] = self._replies[request].popleft()
+        return self._last_reply.get(request)
+
+    def write(self, data) -> int:
+        exchange = self._lookup(bytes(data).decode("ascii").rstrip("\r\n"))
+        if exchange is None:
+            self._pending = None
+        else:
+            reply, latency = exchange
+            self._pending = (reply + "\r\n").encode("ascii")
+            self._pending_time = time() + (latency/self._speed if self._speed > 0 else 0.0)
+        return len(data)
+
+    def read_until(self, expected=b"\n", size=None) -> bytes:
+        if self._pending is None:
+            sleep(self.timeout)
+            return b""
+        sleep(max(0.0, self._pending_time - time()))
+        data, self._pending = self._pending, None
+        return data
+
+    def read(self, size=1) -> bytes:
+        if self._pending is None:
+            sleep(self.timeout)
+            return b""
+        sleep(max(0.0, self._pending_time - time()))
+        data, self._pending = self._pending[:size], self._pending[size:] or None
+        return data
+
+    def flush(self) -> None:
+        pass
+
+    def reset_input_buffer(self) -> None:
+        self._pending = None
+
+    def close(self) -> None:
+        self.is_open = False
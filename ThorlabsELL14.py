@@ -11,12 +11,24 @@ from tango import DevState
 from tango import AttrWriteType
 
 #from thorlabs_elliptec import ELLx
-from ELL14 import ELL14
+from ELL14 import ELL14, ELLBus
 from serial import SerialException
-import serial
 import time
+import json
+import queue
+import threading
 
-__all__ = ["ThorlabsELL14", "main"]
+__all__ = ["ThorlabsELL14", "get_bus", "main"]
+
+# Buses shared by all devices of this server, keyed by serial port
+_buses = {}
+
+
+def get_bus(port):
+    """Return the ELLBus of a serial port, opening it if not yet in use by this server."""
+    if port not in _buses:
+        _buses[port] = ELLBus(port)
+    return _buses[port]
 
 
 class ThorlabsELL14(Device):
@@ -30,6 +42,31 @@ class ThorlabsELL14(Device):
 
     SerialNum = device_property(
         dtype='DevString',
+        doc="serial number regex of the USB adapter to connect to, used if Port is empty",
+    )
+
+    Port = device_property(
+        dtype='DevString',
+        default_value="",
+        doc="serial port of a multi-drop bus, shared with other devices of this server",
+    )
+
+    Address = device_property(
+        dtype='DevShort',
+        default_value=0,
+        doc="device ID of the stage on the bus given by Port",
+    )
+
+    StageSerial = device_property(
+        dtype='DevString',
+        default_value="",
+        doc="8-digit serial number expected of the stage on the bus given by Port, empty for any",
+    )
+
+    CalibrationFile = device_property(
+        dtype='DevString',
+        default_value="",
+        doc="file of commanded and true angles to correct positions with",
     )
 
     # ----------
@@ -69,6 +106,88 @@ class ThorlabsELL14(Device):
         fset = "set_homeoffset",
     )
 
+    num_operations = attribute(
+        dtype='DevULong',
+        access=AttrWriteType.READ,
+        label="Number of movements",
+        format="%5.0f",
+        doc="Number of movements since last maintenance operation",
+        max_warning=10000,
+        fget = "get_num_operations",
+    )
+
+    maintenance = attribute(
+        dtype='DevString',
+        access=AttrWriteType.READ,
+        label="Maintenance",
+        doc="maintenance operation in progress and its elapsed time",
+        fget = "get_maintenance",
+    )
+
+    auto_maintenance = attribute(
+        dtype='DevBoolean',
+        access=AttrWriteType.READ_WRITE,
+        label="Automatic maintenance",
+        doc="run motor optimisation and mechanics cleaning automatically when idle",
+        fget = "get_auto_maintenance",
+        fset = "set_auto_maintenance",
+    )
+
+    move_eta = attribute(
+        dtype='DevDouble',
+        access=AttrWriteType.READ,
+        label="Move ETA",
+        unit="s",
+        format="%5.2f",
+        doc="predicted time until the move in progress completes",
+        fget = "get_move_eta",
+    )
+
+    last_move_duration = attribute(
+        dtype='DevDouble',
+        access=AttrWriteType.READ,
+        label="Last move duration",
+        unit="s",
+        format="%5.2f",
+        doc="duration of the last completed move",
+        fget = "get_last_move_duration",
+    )
+
+    queue_stats = attribute(
+        dtype='DevString',
+        access=AttrWriteType.READ,
+        label="Queue statistics",
+        doc="JSON queue depth and wait time statistics per command priority class",
+        fget = "get_queue_stats",
+    )
+
+    calibrated = attribute(
+        dtype='DevBoolean',
+        access=AttrWriteType.READ,
+        label="Calibrated",
+        doc="positions are corrected with a calibration table",
+        fget = "get_calibrated",
+    )
+
+    scan_positions = attribute(
+        dtype=('DevDouble',),
+        max_dim_x=100000,
+        access=AttrWriteType.READ,
+        label="Scan positions",
+        unit="degree",
+        format="%5.2f",
+        doc="positions reached by the last step_scan or scan, NaN for points not reached yet",
+        fget = "get_scan_positions",
+    )
+
+    snapshot = attribute(
+        dtype='DevString',
+        access=AttrWriteType.READ,
+        label="Snapshot",
+        doc="JSON consistent snapshot of the stage position, velocity, home, status and moving flag",
+        fget = "get_snapshot",
+    )
+
     # ---------------
     # General methods
     # ---------------
@@ -79,16 +198,32 @@ class ThorlabsELL14(Device):
         """Initialises the attributes and properties of the ThorlabsELL14."""
         Device.init_device(self)
         self._serial = self.SerialNum
-        self.db = tango.Database()
+        #background scan started by step_scan or scan
+        self._scan = None
+        self._scan_positions = []
+        self._scan_error = None
+        self._scan_abort = threading.Event()
         self.set_state(DevState.INIT)
         try:
-            self.stage = ELL14(serial_number = self._serial)
-            self.info_stream('Connected to Device {:s}'.format(self._serial))
+            if self.Port:
+                #shared with a ThorlabsELL14Bus device of the same port, if any
+                self.stage = get_bus(self.Port).acquire(self.Address, device_serial = self.StageSerial.strip() or None)
+            else:
+                self.stage = ELL14(serial_number = self._serial)
+            self.info_stream('Connected to Device {:s}'.format(self.stage.serial_number))
+            if self.CalibrationFile:
+                self.stage.load_calibration(self.CalibrationFile)
             print(self._serial)
             self.init_params()
+            self.set_change_event("position", True, False)
+            #samples arrive on the bus thread, which must never wait for the device monitor,
+            #so they are queued and pushed from a separate thread
+            self._samples = queue.Queue(maxsize=1000)
+            threading.Thread(target=self.push_samples, args=(self._samples,), daemon=True).start()
+            self.stage.subscribe(self.queue_position)
             self.set_state(DevState.ON)
         except SerialException:
-            self.error_stream('Cannot connect to Device {:s}'.format(self._serial))
+            self.error_stream('Cannot connect to Device {:s}'.format(self.StageSerial if self.Port else self._serial))
             self.set_state(DevState.FAULT)
 
     def init_params(self):
@@ -98,12 +233,23 @@ class ThorlabsELL14(Device):
     def always_executed_hook(self):
         """Method always executed before any TANGO command is executed."""
         info = ""
-        if self.stage.is_moving():
+        if self.stage.maintenance:
+            self.set_state(DevState.RUNNING)
+            info += f"\nThe device is RUNNING {self.stage.maintenance}"
+        elif self.stage.is_rotating():
+            self.set_state(DevState.MOVING)
+            info += "\nThe device is ROTATING continuously"
+        elif self._scan is not None and self._scan.is_alive():
+            self.set_state(DevState.MOVING)
+            info += "\nThe device is SCANNING"
+        elif self.stage.is_moving():
             self.set_state(DevState.MOVING)
             info += "\nThe device is MOVING"
         else:
             self.set_state(DevState.ON)
             info += "\nThe device is ON"
+        if self._scan_error is not None:
+            info += f"\nThe last scan failed: {self._scan_error}"
         self.set_status(info)
 
     def delete_device(self):
@@ -113,8 +259,16 @@ class ThorlabsELL14(Device):
         init_device method to be released.  This method is called by the device
         destructor and by the device Init command.
         """
-        self.stage.close()
-        self.info_stream('Closed connection to Device {:s}'.format(serial))
+        self._scan_abort.set()
+        self.stage.unsubscribe(self.queue_position)
+        #stop the event thread, without waiting as it may be blocked on the device monitor
+        self._samples.put(None)
+        if self.Port:
+            #only closed once no other device uses the stage
+            get_bus(self.Port).release(self.stage)
+        else:
+            self.stage.close()
+        self.info_stream('Closed connection to Device {:s}'.format(self.stage.serial_number))
 
     # ------------------
     # Attributes methods
@@ -122,21 +276,41 @@ class ThorlabsELL14(Device):
 
     def read_position(self):
         #get the position attribute.
-        return round(self.stage.get_position(),2)
+        return self.stage.get_position()
 
     def write_position(self, value):
         #Set the position attribute.
         self.stage.move_absolute((value)%360.0, blocking = True)
         self.set_state(DevState.MOVING)
 
+    def queue_position(self, timestamp, position):
+        #queue a position sample taken during continuous rotation, dropped if the queue is full.
+        try:
+            self._samples.put_nowait((timestamp, position))
+        except queue.Full:
+            pass
+
+    def push_samples(self, samples):
+        #push queued position samples as change events, until None is queued.
+        with tango.EnsureOmniThread():
+            while True:
+                sample = samples.get()
+                if sample is None:
+                    return
+                timestamp, position = sample
+                try:
+                    self.push_change_event("position", position, timestamp, tango.AttrQuality.ATTR_CHANGING)
+                except tango.DevFailed:
+                    #monitor held by a long command, drop the sample
+                    pass
+
     def get_homeoffset(self):
         #get home attribute.
         return self.stage.get_home()
     
     def set_homeoffset(self,value):
         #set home attribute.
-        value = value%360
-        self.stage._updatequeue.append(f"so{int(143360*value/360.0) & 0xffffffff:08X}")
+        self.stage.set_home(value%360)
 
     def get_vel(self):
         #get velocity attribute.
@@ -144,11 +318,56 @@ class ThorlabsELL14(Device):
 
     def set_vel(self, value):
         #Set the velocity attribute.
-        value = int(value)
-        if value <= 64:
-            self.stage._updatequeue.append('sv'+str(value))
-        else:
-            self.comm('sv64')
+        self.stage.set_velocity(value)
+
+    def get_num_operations(self):
+        #get number of movements since last maintenance.
+        return self.stage.move_count
+
+    def get_maintenance(self):
+        #get maintenance operation in progress.
+        if self.stage.maintenance:
+            return f"{self.stage.maintenance} ({self.stage.maintenance_elapsed:.0f} s)"
+        return "idle"
+
+    def get_auto_maintenance(self):
+        #get automatic maintenance attribute.
+        return self.stage.auto_maintenance
+
+    def set_auto_maintenance(self, value):
+        #set automatic maintenance attribute.
+        self.stage.auto_maintenance = value
+
+    def get_move_eta(self):
+        #get predicted time until the move in progress completes.
+        return self.stage.move_eta
+
+    def get_last_move_duration(self):
+        #get duration of the last completed move.
+        return self.stage.last_move_duration
+
+    def get_queue_stats(self):
+        #get command queue statistics.
+        return json.dumps(self.stage.queue_stats())
+
+    def get_calibrated(self):
+        #get calibration attribute.
+        return self.stage.calibration is not None
+
+    def get_scan_positions(self):
+        #get positions reached by the last scan.
+        return self._scan_positions
+
+    def get_snapshot(self):
+        #get all stage state from the same snapshot.
+        snap = self.stage.snapshot()
+        return json.dumps(dict(counts = snap.counts,
+                               position = snap.position,
+                               velocity = snap.velocity,
+                               home = snap.home,
+                               status = int(snap.status),
+                               moving = snap.moving,
+                               timestamp = snap.timestamp))
 
     # --------
     # Commands
@@ -169,15 +388,102 @@ class ThorlabsELL14(Device):
         self.stage.move_absolute(0.)
         self.write_position(pos)
 
+    @command(dtype_in = int)
+    @DebugIt()
+    def rotate(self, direction):
+        #rotate continuously, forward for 0 and backward for 1.
+        self.stage.rotate(direction)
+        self.set_state(DevState.MOVING)
+
+    @command()
+    @DebugIt()
+    def stop(self):
+        #also aborts a scan after the step in progress.
+        self._scan_abort.set()
+        self.stage.stop(blocking = True)
+
+    @command()
+    @DebugIt()
+    def optimize(self):
+        self.stage.optimize_motors()
+        self.set_state(DevState.RUNNING)
+
+    @command()
+    @DebugIt()
+    def clean(self):
+        self.stage.clean_mechanics()
+        self.set_state(DevState.RUNNING)
+
+    def start_scan(self, points, run):
+        #run a scan in the background, as it may take longer than the client timeout.
+        #run(callback) performs the scan, calling callback(index, position) at each point.
+        if self._scan is not None and self._scan.is_alive():
+            raise RuntimeError("A scan is already running")
+        self._scan_positions = [float("nan")]*points
+        self._scan_error = None
+        self._scan_abort.clear()
+        def record(index, position):
+            self._scan_positions[index] = position
+            if self._scan_abort.is_set():
+                raise RuntimeError("Scan aborted")
+        def target():
+            try:
+                run(record)
+            except Exception as ex:
+                self.error_stream('Scan failed: {}'.format(ex))
+                self._scan_error = ex
+        self._scan = threading.Thread(target=target, daemon=True)
+        self._scan.start()
+        self.set_state(DevState.MOVING)
+
+    @command(dtype_in = [float])
+    @DebugIt()
+    def step_scan(self, args):
+        #jog in equal steps of args[0] degree, args[1] times. Returns immediately, the
+        #positions reached are in the scan_positions attribute.
+        step, points = args[0], int(args[1])
+        self.start_scan(points, lambda callback: self.stage.step_scan(abs(step), points, direction = int(step < 0), callback = callback))
+
+    @command(dtype_in = [str], dtype_out = str)
+    @DebugIt()
+    def set_parameters(self, settings):
+        #set several parameters at once from "key=value" strings, keys are
+        #velocity, home, jog_step and save. Returns the read-back values as JSON.
+        kwargs = {}
+        for setting in settings:
+            key, value = (part.strip() for part in setting.split("=", 1))
+            if key == "save":
+                kwargs[key] = value.lower() in ("1", "true", "yes")
+            elif key in ("velocity", "home", "jog_step"):
+                kwargs[key] = float(value)
+            else:
+                raise ValueError(f"Unknown parameter '{key}'")
+        if "home" in kwargs:
+            kwargs["home"] = kwargs["home"]%360
+        return json.dumps(self.stage.set_parameters(**kwargs))
+
+    @command(dtype_in = [float])
+    @DebugIt()
+    def scan(self, targets):
+        #visit all target angles in the order of shortest total move time. Returns
+        #immediately, the positions reached are in the scan_positions attribute, in the
+        #order of the targets.
+        targets = [value%360.0 for value in targets]
+        self.start_scan(len(targets), lambda callback: self.stage.execute_scan(targets, callback = callback))
+
+    @command(dtype_in = str)
+    @DebugIt()
+    def load_calibration(self, filename):
+        self.stage.load_calibration(filename)
+
     @command(dtype_in = str, dtype_out = str)
     def comm(self, comman):
-        return_data = str(self.stage._write_command(comman))
+        return_data = str(self.stage.query(comman))
         return return_data
 
     @command(dtype_in = float)
     def ShiftOffset(self, shift):
-        co = self.get_homeoffset()
-        self.set_homeoffset(co+shift)
+        self.stage.shift_home(shift)
 # ----------
 # Run server
 # ----------
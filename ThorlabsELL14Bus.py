@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+#
+
+import tango
+from tango import DebugIt
+from tango.server import run
+from tango.server import Device
+from tango.server import attribute, command
+from tango.server import device_property
+from tango import DevState
+from tango import AttrWriteType
+
+from ThorlabsELL14 import ThorlabsELL14, get_bus
+from serial import SerialException
+
+__all__ = ["ThorlabsELL14Bus", "main"]
+
+
+class ThorlabsELL14Bus(Device):
+    """
+    This is a Tango device server for all Thorlabs ELL14 rotation stages on one serial port.
+
+    The stages are discovered at startup, and each gets a set of dynamic attributes named after
+    its address, such as ``position_2``. The array attributes read or write all stages at once.
+    ThorlabsELL14 devices served by the same process with the same Port property share the
+    serial port with this device, and the same stage object for the same address.
+    """
+
+    # -----------------
+    # Device Properties
+    # -----------------
+
+    Port = device_property(
+        dtype='DevString',
+        mandatory=True,
+        doc="serial port of the multi-drop bus",
+    )
+
+    Addresses = device_property(
+        dtype=('DevShort',),
+        default_value=list(range(16)),
+        doc="device IDs to probe for stages",
+    )
+
+    # ----------
+    # Attributes
+    # ----------
+
+    addresses = attribute(
+        dtype=('DevShort',),
+        max_dim_x=16,
+        access=AttrWriteType.READ,
+        label="Addresses",
+        doc="device IDs of the discovered stages",
+        fget = "get_addresses",
+    )
+
+    positions = attribute(
+        dtype=('DevFloat',),
+        max_dim_x=16,
+        access=AttrWriteType.READ_WRITE,
+        label="Positions",
+        unit="degree",
+        format="%5.2f",
+        doc="absolute positions of all stages in degree, in order of addresses",
+        fget = "get_positions",
+        fset = "set_positions",
+    )
+
+    velocities = attribute(
+        dtype=('DevFloat',),
+        max_dim_x=16,
+        access=AttrWriteType.READ_WRITE,
+        label="Velocities",
+        unit="arb. u.",
+        doc="velocities of all stages between 0 and 64, in order of addresses",
+        fget = "get_velocities",
+        fset = "set_velocities",
+    )
+
+    homes = attribute(
+        dtype=('DevFloat',),
+        max_dim_x=16,
+        access=AttrWriteType.READ,
+        label="Homes",
+        unit="degree",
+        format="%5.2f",
+        doc="home positions of all stages in degree, in order of addresses",
+        fget = "get_homes",
+    )
+
+    moving = attribute(
+        dtype=('DevBoolean',),
+        max_dim_x=16,
+        access=AttrWriteType.READ,
+        label="Moving",
+        doc="moving flags of all stages, in order of addresses",
+        fget = "get_moving",
+    )
+
+    # ---------------
+    # General methods
+    # ---------------
+
+    def init_device(self):
+        """Initialises the attributes and properties of the ThorlabsELL14Bus."""
+        Device.init_device(self)
+        self.set_state(DevState.INIT)
+        self.stages = {}
+        try:
+            self.bus = get_bus(self.Port)
+            for address in self.bus.scan(self.Addresses):
+                self.stages[address] = self.bus.acquire(address)
+            self.info_stream('Found stages {} on {:s}'.format(sorted(self.stages), self.Port))
+            self.set_state(DevState.ON)
+        except SerialException:
+            self.error_stream('Cannot connect to Port {:s}'.format(self.Port))
+            self.set_state(DevState.FAULT)
+
+    def initialize_dynamic_attributes(self):
+        """Creates the attributes of each discovered stage."""
+        for address in sorted(self.stages):
+            self.add_attribute(tango.Attr(f"position_{address}", tango.DevFloat, tango.READ_WRITE),
+                               self.read_axis, self.write_axis)
+            self.add_attribute(tango.Attr(f"velocity_{address}", tango.DevFloat, tango.READ_WRITE),
+                               self.read_axis, self.write_axis)
+            self.add_attribute(tango.Attr(f"home_{address}", tango.DevFloat, tango.READ_WRITE),
+                               self.read_axis, self.write_axis)
+            self.add_attribute(tango.Attr(f"status_{address}", tango.DevShort, tango.READ),
+                               self.read_axis)
+
+    def always_executed_hook(self):
+        """Method always executed before any TANGO command is executed."""
+        if self.get_state() == DevState.FAULT:
+            return
+        moving = [address for address, stage in sorted(self.stages.items()) if stage.is_moving()]
+        if moving:
+            self.set_state(DevState.MOVING)
+            self.set_status("\nThe stages {} are MOVING".format(moving))
+        else:
+            self.set_state(DevState.ON)
+            self.set_status("\nThe device is ON")
+
+    def delete_device(self):
+        """Hook to delete resources allocated in init_device."""
+        for stage in self.stages.values():
+            self.bus.release(stage)
+        self.info_stream('Closed stages on {:s}'.format(self.Port))
+
+    # ------------------
+    # Attributes methods
+    # ------------------
+
+    def read_axis(self, attr):
+        #get a per-stage attribute, named <parameter>_<address>.
+        parameter, address = attr.get_name().rsplit("_", 1)
+        stage = self.stages[int(address)]
+        if parameter == "position":
+            attr.set_value(stage.get_position())
+        elif parameter == "velocity":
+            attr.set_value(stage.get_velocity())
+        elif parameter == "home":
+            attr.set_value(stage.get_home())
+        else:
+            attr.set_value(int(stage.status))
+
+    def write_axis(self, attr):
+        #set a per-stage attribute, named <parameter>_<address>.
+        parameter, address = attr.get_name().rsplit("_", 1)
+        stage = self.stages[int(address)]
+        value = attr.get_write_value()
+        if parameter == "position":
+            stage.move_absolute(value%360.0, blocking = True)
+        elif parameter == "velocity":
+            stage.set_velocity(value)
+        else:
+            stage.set_home(value%360)
+
+    def get_addresses(self):
+        return sorted(self.stages)
+
+    def get_positions(self):
+        return [self.stages[address].get_position() for address in sorted(self.stages)]
+
+    def set_positions(self, values):
+        #start all moves, then wait for all of them.
+        stages = [self.stages[address] for address in sorted(self.stages)]
+        for stage, value in zip(stages, values):
+            stage.move_absolute(value%360.0)
+        for stage in stages:
+            stage.wait(raise_errors = True)
+
+    def get_velocities(self):
+        return [self.stages[address].get_velocity() for address in sorted(self.stages)]
+
+    def set_velocities(self, values):
+        for address, value in zip(sorted(self.stages), values):
+            self.stages[address].set_velocity(value)
+
+    def get_homes(self):
+        return [self.stages[address].get_home() for address in sorted(self.stages)]
+
+    def get_moving(self):
+        return [self.stages[address].is_moving() for address in sorted(self.stages)]
+
+    # --------
+    # Commands
+    # --------
+
+    @command()
+    @DebugIt()
+    def homing(self):
+        stages = [self.stages[address] for address in sorted(self.stages)]
+        for stage in stages:
+            stage.home()
+        for stage in stages:
+            stage.wait(raise_errors = True)
+
+    @command()
+    @DebugIt()
+    def stop(self):
+        for stage in self.stages.values():
+            if stage.is_rotating() or stage.maintenance:
+                stage.stop()
+
+# ----------
+# Run server
+# ----------
+
+
+def main(args=None, **kwargs):
+    """Main function of the ThorlabsELL14Bus module."""
+    return run((ThorlabsELL14Bus, ThorlabsELL14), args=args, **kwargs)
+
+
+if __name__ == '__main__':
+    main()
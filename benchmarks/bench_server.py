@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmarks of the ThorlabsELL14 device server against simulated stages.
+
+The device server runs in pytango's test context, with each device connected to a
+:class:`~simulator.SimulatedELL14` port instead of real hardware. Results are written as JSON and
+compared against regression thresholds, exiting with a non-zero status if any threshold is
+exceeded::
+
+    python benchmarks/bench_server.py --clients 4 --devices 4 --output bench_output.json
+"""
+
+import argparse, json, os, sys, threading, statistics
+from time import perf_counter, process_time, sleep
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir))
+
+import tango
+from tango.test_context import MultiDeviceTestContext
+
+import ELL14
+import ThorlabsELL14 as server
+from simulator import SimulatedELL14
+
+# Default location of the regression thresholds
+THRESHOLDS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "thresholds.json")
+
+
+def simulated_stage(**kwargs):
+    """
+    Replacement for the ELL14 class used by the device server, connecting to a simulated stage.
+    """
+    return ELL14.ELL14(serial_port=SimulatedELL14())
+
+
+def percentile(values, fraction):
+    """
+    Return the given fraction percentile of a list of values.
+    """
+    values = sorted(values)
+    return values[min(int(fraction*len(values)), len(values) - 1)]
+
+
+def bench_startup(devices):
+    """
+    Start a device server with the given number of devices, and time its startup.
+    """
+    devices_info = ({"class": server.ThorlabsELL14,
+                     "devices": [{"name": f"bench/ell14/{i}", "properties": {"SerialNum": f"SIM{i}"}}
+                                 for i in range(devices)]},)
+    start = perf_counter()
+    # Each device takes a few seconds to initialise, so allow for it in the startup timeout
+    context = MultiDeviceTestContext(devices_info, process=False, timeout=10.0 + 5.0*devices)
+    context.start()
+    for i in range(devices):
+        tango.DeviceProxy(context.get_device_access(f"bench/ell14/{i}")).ping()
+    elapsed = perf_counter() - start
+    return context, {"startup_s_per_device": elapsed/devices}
+
+
+def bench_reads(context, clients, duration):
+    """
+    Read the position and snapshot attributes from concurrent clients.
+    """
+    access = context.get_device_access("bench/ell14/0")
+    latencies = {"position": [], "snapshot": []}
+    lock = threading.Lock()
+
+    def client(name, read):
+        proxy = tango.DeviceProxy(access)
+        local = []
+        end = perf_counter() + duration
+        while perf_counter() < end:
+            start = perf_counter()
+            read(proxy)
+            local.append(perf_counter() - start)
+        with lock:
+            latencies[name].extend(local)
+
+    results = {}
+    for name, read in (("position", lambda proxy: proxy.read_attribute("position")),
+                       ("snapshot", lambda proxy: proxy.read_attribute("snapshot"))):
+        threads = [threading.Thread(target=client, args=(name, read)) for _ in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        results[f"{name}_read_latency_mean_ms"] = 1e3*statistics.mean(latencies[name])
+        results[f"{name}_read_latency_p95_ms"] = 1e3*percentile(latencies[name], 0.95)
+        results[f"{name}_read_throughput_hz"] = len(latencies[name])/duration
+    return results
+
+
+def bench_blocking_moves(context, moves):
+    """
+    Time blocking moves made by writing the position attribute.
+    """
+    proxy = tango.DeviceProxy(context.get_device_access("bench/ell14/0"))
+    durations = []
+    for i in range(moves):
+        start = perf_counter()
+        proxy.write_attribute("position", 10.0*(i % 2))
+        durations.append(perf_counter() - start)
+    return {"blocking_move_mean_s": statistics.mean(durations)}
+
+
+def bench_idle_cpu(devices, duration):
+    """
+    Measure the CPU time used by the server process while all devices are idle.
+    """
+    start_wall, start_cpu = perf_counter(), process_time()
+    sleep(duration)
+    cpu = (process_time() - start_cpu)/(perf_counter() - start_wall)
+    return {"idle_cpu_percent_per_device": 100*cpu/devices}
+
+
+def bench_stage(moves, duration):
+    """
+    Time non-blocking moves and the status poll cycle directly on the ELL14 class.
+    """
+    stage = ELL14.ELL14(serial_port=SimulatedELL14())
+    try:
+        submit, durations = [], []
+        for i in range(moves):
+            start = perf_counter()
+            stage.move_absolute(10.0*(i % 2))
+            submit.append(perf_counter() - start)
+            stage.wait(raise_errors=True)
+            durations.append(perf_counter() - start)
+        # Poll cycle period from the timestamps of successive snapshots
+        timestamps = []
+        end = perf_counter() + duration
+        while perf_counter() < end:
+            timestamp = stage.snapshot().timestamp
+            if not timestamps or timestamp != timestamps[-1]:
+                timestamps.append(timestamp)
+            sleep(0.005)
+        periods = [b - a for a, b in zip(timestamps[:-1], timestamps[1:])]
+        period = statistics.mean(periods) if periods else float("nan")
+        return {"nonblocking_move_submit_ms": 1e3*statistics.mean(submit),
+                "nonblocking_move_mean_s": statistics.mean(durations),
+                "poll_cycle_s": period - stage.status_poll_interval}
+    finally:
+        stage.close()
+
+
+def check_thresholds(metrics, thresholds):
+    """
+    Compare metrics against thresholds, and return a list of regressions found.
+    """
+    regressions = []
+    for name, limits in thresholds.items():
+        if name not in metrics:
+            continue
+        if "max" in limits and metrics[name] > limits["max"]:
+            regressions.append(f"{name} = {metrics[name]:.4g} exceeds maximum of {limits['max']}")
+        if "min" in limits and metrics[name] < limits["min"]:
+            regressions.append(f"{name} = {metrics[name]:.4g} below minimum of {limits['min']}")
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--clients", type=int, default=4, help="number of concurrent clients")
+    parser.add_argument("--devices", type=int, default=4, help="number of devices in the server")
+    parser.add_argument("--duration", type=float, default=5.0, help="duration of timed benchmarks, in seconds")
+    parser.add_argument("--moves", type=int, default=10, help="number of moves to time")
+    parser.add_argument("--output", default="bench_output.json", help="file to write results to")
+    parser.add_argument("--thresholds", default=THRESHOLDS, help="JSON file of regression thresholds")
+    args = parser.parse_args(args)
+
+    server.ELL14 = simulated_stage
+    metrics = {}
+    context, results = bench_startup(args.devices)
+    metrics.update(results)
+    try:
+        metrics.update(bench_idle_cpu(args.devices, args.duration))
+        metrics.update(bench_reads(context, args.clients, args.duration))
+        metrics.update(bench_blocking_moves(context, args.moves))
+    finally:
+        context.stop()
+    metrics.update(bench_stage(args.moves, args.duration))
+
+    with open(args.thresholds) as f:
+        regressions = check_thresholds(metrics, json.load(f))
+    with open(args.output, "w") as f:
+        json.dump({"version": ELL14.__version__,
+                   "parameters": {"clients": args.clients, "devices": args.devices,
+                                  "duration": args.duration, "moves": args.moves},
+                   "metrics": metrics,
+                   "regressions": regressions}, f, indent=2)
+
+    for name, value in metrics.items():
+        print(f"{name:40s} {value:.4g}")
+    for regression in regressions:
+        print(f"REGRESSION: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
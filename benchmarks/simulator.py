@@ -0,0 +1,145 @@
+import struct, threading
+from time import sleep, time
+
+
+class SimulatedELL14():
+    """
+    Fake serial port simulating one or more Thorlabs ELL14 rotation mounts on a multi-drop bus.
+
+    An instance may be passed as the ``serial_port`` parameter of :class:`~ELL14.ELL14` in place of
+    a real serial port. The simulation covers the commands used by :class:`~ELL14.ELL14`, including
+    moves, jogging, continuous rotation and maintenance operations.
+
+    Each exchange is delayed by the time the request and reply take to transfer at the given
+    ``baudrate``, plus a fixed device ``latency``. Moves additionally take the time needed to travel
+    the distance at ``speed`` degrees per second, scaled by the velocity setting.
+
+    :param addresses: Device IDs present on the simulated bus.
+    :param baudrate: Simulated serial baud rate, or 0 to not simulate transfer time.
+    :param latency: Simulated device response time, in seconds.
+    :param speed: Rotation speed at full velocity setting, in degrees per second.
+    :param timeout: Read timeout in seconds, if no reply is pending.
+    """
+
+    # Encoder counts per revolution of an ELL14
+    PULSES = 143360
+
+    def __init__(self, addresses=(0,), baudrate:int=9600, latency:float=0.002, speed:float=430.0, timeout:float=0.2):
+        self.name = "simulated"
+        self.is_open = True
+        self.timeout = timeout
+        self._baudrate = baudrate
+        self._latency = latency
+        self._speed = speed
+        self._lock = threading.Lock()
+        self._pending = b""
+        self._axes = {int(a): {"position": 0, "velocity": 64, "home": 0, "jog": 0,
+                               "rotating": 0, "rotation_start": 0.0, "busy_until": 0.0}
+                      for a in addresses}
+
+    def _transfer_time(self, nbytes):
+        # 10 bits per byte, including start and stop bits
+        return 10*nbytes/self._baudrate if self._baudrate else 0.0
+
+    def _travel(self, axis, target):
+        distance = abs(target - axis["position"])*360.0/self.PULSES
+        sleep(distance/(self._speed*max(axis["velocity"], 1)/64))
+        axis["position"] = int(target)
+
+    def _update_rotation(self, axis):
+        if axis["rotating"]:
+            now = time()
+            counts = self._speed*max(axis["velocity"], 1)/64*(now - axis["rotation_start"])*self.PULSES/360.0
+            axis["position"] += axis["rotating"]*int(counts)
+            axis["rotation_start"] = now
+
+    def _reply(self, address, command, argument):
+        axis = self._axes[address]
+        prefix = f"{address:01X}"
+        position = lambda: f"{prefix}PO{axis['position'] & 0xffffffff:08X}"
+        value = lambda: struct.unpack(">i", bytes.fromhex(argument))[0]
+        if command == "in":
+            return f"{prefix}IN0E1140000120230101016800023000"
+        if command == "gs":
+            busy = time() < axis["busy_until"] or axis["rotating"]
+            return f"{prefix}GS{9 if busy else 0:02X}"
+        if command == "gp":
+            self._update_rotation(axis)
+            return position()
+        if command == "gv":
+            return f"{prefix}GV{axis['velocity']}"
+        if command == "sv":
+            axis["velocity"] = min(int(argument), 64)
+            return f"{prefix}GS00"
+        if command == "go":
+            return f"{prefix}HO{axis['home'] & 0xffffffff:08X}"
+        if command == "so":
+            axis["home"] = value()
+            return f"{prefix}GS00"
+        if command == "gj":
+            return f"{prefix}GJ{axis['jog'] & 0xffffffff:08X}"
+        if command == "sj":
+            axis["jog"] = value()
+            return f"{prefix}GS00"
+        if command == "ma":
+            self._travel(axis, value())
+            return position()
+        if command == "mr":
+            self._travel(axis, axis["position"] + value())
+            return position()
+        if command == "ho":
+            self._travel(axis, 0)
+            return position()
+        if command in ("fw", "bw"):
+            direction = 1 if command == "fw" else -1
+            if axis["jog"] == 0:
+                axis["rotating"] = direction
+                axis["rotation_start"] = time()
+                return f"{prefix}GS09"
+            self._travel(axis, axis["position"] + direction*axis["jog"])
+            return position()
+        if command == "st":
+            if axis["busy_until"]:
+                axis["busy_until"] = 0.0
+                return f"{prefix}GS00"
+            self._update_rotation(axis)
+            axis["rotating"] = 0
+            return position()
+        if command in ("om", "cm"):
+            axis["busy_until"] = time() + 1.0
+            return f"{prefix}GS09"
+        if command == "us":
+            return f"{prefix}GS00"
+        return f"{prefix}GS03"
+
+    def write(self, data) -> int:
+        request = bytes(data).decode("ascii").rstrip("\r\n")
+        sleep(self._transfer_time(len(data)))
+        with self._lock:
+            address, command, argument = int(request[0], 16), request[1:3], request[3:]
+            if address in self._axes:
+                sleep(self._latency)
+                self._pending = (self._reply(address, command, argument) + "\r\n").encode("ascii")
+            else:
+                # No device with this ID on the bus, so nothing answers
+                self._pending = b""
+        return len(data)
+
+    def read_until(self, expected=b"\n", size=None) -> bytes:
+        data, self._pending = self._pending, b""
+        if not data:
+            sleep(self.timeout)
+        sleep(self._transfer_time(len(data)))
+        return data
+
+    def read(self, size=1) -> bytes:
+        return self.read_until()
+
+    def flush(self) -> None:
+        pass
+
+    def reset_input_buffer(self) -> None:
+        self._pending = b""
+
+    def close(self) -> None:
+        self.is_open = False
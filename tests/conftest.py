@@ -0,0 +1,29 @@
+import os, sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir)
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+import ELL14
+from simulator import SimulatedELL14
+
+
+@pytest.fixture
+def stage():
+    """
+    ELL14 connected to a fast simulated stage.
+    """
+    stage = ELL14.ELL14(serial_port=SimulatedELL14(baudrate=0, latency=0.0, speed=4300.0))
+    yield stage
+    stage.close()
+
+
+@pytest.fixture
+def bus():
+    """
+    Bus with two fast simulated stages at device IDs 0 and 1.
+    """
+    bus = ELL14.ELLBus(SimulatedELL14(addresses=(0, 1), baudrate=0, latency=0.0, speed=4300.0))
+    yield bus
+    bus.close()
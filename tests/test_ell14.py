@@ -0,0 +1,121 @@
+import time
+
+import pytest
+
+import ELL14
+from ELLCalibration import ELLCalibration
+
+
+def test_home(stage):
+    stage.move_absolute(45.0, blocking=True)
+    stage.home(blocking=True)
+    assert stage.get_position() == pytest.approx(0.0, abs=0.01)
+
+
+def test_move_absolute(stage):
+    stage.move_absolute(123.4, blocking=True)
+    assert stage.get_position() == pytest.approx(123.4, abs=0.01)
+    assert not stage.is_moving()
+
+
+def test_uncalibrated_positions_not_wrapped(stage):
+    stage.move_relative(400.0, blocking=True)
+    assert stage.get_position() == pytest.approx(400.0, abs=0.01)
+
+
+def test_calibrated_positions_wrapped(stage):
+    stage.calibration = ELLCalibration([0, 90, 180, 270], [0.5, 90.5, 180.5, 270.5])
+    stage.move_absolute(359.0, blocking=True)
+    stage.move_relative(2.0, blocking=True)
+    assert stage.get_position() == pytest.approx(1.0, abs=0.01)
+
+
+def test_parameters_cached(stage):
+    stage.set_velocity(50)
+    stage.set_home(12.5)
+    # The new values are returned before the device has confirmed them
+    assert stage.get_velocity() == 50
+    assert stage.get_home() == pytest.approx(12.5, abs=0.01)
+    readback = stage.set_parameters(velocity=40, home=5.0)
+    assert readback["velocity"] == 40
+    assert readback["home"] == pytest.approx(5.0, abs=0.01)
+
+
+def test_snapshot(stage):
+    stage.move_absolute(90.0, blocking=True)
+    snapshot = stage.snapshot()
+    assert snapshot.position == pytest.approx(90.0, abs=0.01)
+    assert snapshot.counts == stage.get_position_raw()
+    assert not snapshot.moving
+
+
+def test_step_scan(stage):
+    stage.set_jog_step(1.0)
+    reached = []
+    positions = stage.step_scan(10.0, 5, callback=lambda index, position: reached.append(index))
+    assert positions == pytest.approx([10.0, 20.0, 30.0, 40.0, 50.0], abs=0.01)
+    assert reached == [0, 1, 2, 3, 4]
+    # The previous jog step is restored, so a jog moves by it again
+    stage.jog(blocking=True)
+    assert stage.get_position() == pytest.approx(51.0, abs=0.01)
+
+
+def test_execute_scan(stage):
+    targets = [300.0, 10.0, 120.0]
+    positions = stage.execute_scan(targets)
+    assert positions == pytest.approx(targets, abs=0.01)
+
+
+def test_acquire_release(bus):
+    first = bus.acquire(1)
+    second = bus.acquire(1, device_serial=first.serial_number)
+    assert first is second
+    with pytest.raises(RuntimeError):
+        bus.acquire(1, device_serial="99999999")
+    bus.release(first)
+    assert 1 in bus.devices
+    bus.release(second)
+    assert 1 not in bus.devices
+
+
+def test_discover_counts_users(bus):
+    found = bus.discover(timeout=0.05)
+    assert sorted(found) == [0, 1]
+    device = bus.acquire(1)
+    bus.release(device)
+    assert 1 in bus.devices
+    for device in found.values():
+        bus.release(device)
+    assert not bus.devices
+
+
+def test_maintenance_exclusive(bus):
+    first, second = bus.acquire(0), bus.acquire(1)
+    first.clean_mechanics()
+    time.sleep(0.2)
+    assert first.maintenance == "mechanics cleaning"
+    assert bus.maintenance_device is first
+    with pytest.raises(ELL14.ELLError):
+        second.optimize_motors(blocking=True)
+    with pytest.raises(ELL14.ELLError):
+        second.move_absolute(10.0, blocking=True)
+    first.wait(raise_errors=True)
+    assert first.maintenance is None
+    assert bus.maintenance_device is None
+    second.move_absolute(10.0, blocking=True)
+    assert second.get_position() == pytest.approx(10.0, abs=0.01)
+    bus.release(first)
+    bus.release(second)
+
+
+def test_maintenance_cooldown(stage):
+    stage.optimize_motors(blocking=True)
+    stage.maintenance_idle = 0.0
+    stage.maintenance_interval = 0
+    stage.auto_maintenance = True
+    time.sleep(5*stage.status_poll_interval)
+    assert stage.maintenance is None
+    stage.maintenance_cooldown = 0.0
+    time.sleep(5*stage.status_poll_interval)
+    assert stage.maintenance is not None
+    stage.stop()
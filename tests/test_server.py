@@ -0,0 +1,65 @@
+import json, time
+
+import pytest
+
+tango = pytest.importorskip("tango")
+from tango import DevState
+from tango.test_context import DeviceTestContext
+
+import ELL14
+import ThorlabsELL14 as server
+from simulator import SimulatedELL14
+
+
+@pytest.fixture(scope="module")
+def proxy():
+    """
+    ThorlabsELL14 device server running in the test context against a fast simulated stage.
+    """
+    connect = server.ELL14
+    server.ELL14 = lambda **kwargs: ELL14.ELL14(serial_port=SimulatedELL14(baudrate=0, latency=0.0, speed=4300.0))
+    try:
+        with DeviceTestContext(server.ThorlabsELL14, properties={"SerialNum": "SIM"}, process=False, timeout=30) as proxy:
+            yield proxy
+    finally:
+        server.ELL14 = connect
+
+
+def wait_idle(proxy, timeout=10.0):
+    """
+    Wait for the device to leave the MOVING state.
+    """
+    end = time.monotonic() + timeout
+    while proxy.state() == DevState.MOVING:
+        assert time.monotonic() < end, "device still moving"
+        time.sleep(0.01)
+
+
+def test_homing(proxy):
+    proxy.position = 45.0
+    proxy.homing()
+    wait_idle(proxy)
+    assert proxy.position == pytest.approx(0.0, abs=0.01)
+
+
+def test_snapshot(proxy):
+    proxy.position = 90.0
+    wait_idle(proxy)
+    snapshot = json.loads(proxy.snapshot)
+    assert snapshot["position"] == pytest.approx(90.0, abs=0.01)
+    assert not snapshot["moving"]
+
+
+def test_step_scan_background(proxy):
+    proxy.position = 0.0
+    proxy.step_scan([10.0, 5])
+    wait_idle(proxy)
+    assert list(proxy.scan_positions) == pytest.approx([10.0, 20.0, 30.0, 40.0, 50.0], abs=0.01)
+
+
+def test_scan_order(proxy):
+    targets = [300.0, 10.0, 120.0]
+    proxy.scan(targets)
+    wait_idle(proxy)
+    assert list(proxy.scan_positions) == pytest.approx(targets, abs=0.01)
+    assert "scan failed" not in proxy.status()